@@ -1,10 +1,17 @@
 
+import asyncio
+import io
+import itertools
 import os
+import re
+import threading
+import time
 import google.generativeai as genai
 from PIL import Image
 from google.api_core import exceptions, retry
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
 import weave
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import tempfile
 
@@ -15,62 +22,265 @@ load_dotenv()  # This will read from your .env file
 genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
 
 # Function to upload image to Gemini
-def upload_to_gemini(pil_image, mime_type=None):
+def upload_to_gemini(image, mime_type=None):
+    """Upload a PIL image (as PNG) or already-encoded JPEG bytes, which are sent as-is."""
+    encoded = isinstance(image, (bytes, bytearray))
     # Create a temporary file for the image
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as temp_file:
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg" if encoded else ".png") as temp_file:
         temp_filename = temp_file.name
+        if encoded:
+            temp_file.write(image)
 
-    # Save the image in PNG format
-    pil_image.save(temp_filename, format="PNG")
+    if not encoded:
+        # Save the image in PNG format
+        image.save(temp_filename, format="PNG")
+        mime_type = mime_type or "image/png"
 
     try:
         # Upload the image file to Gemini
-        file = genai.upload_file(temp_filename, mime_type=mime_type or "image/png")
+        file = genai.upload_file(temp_filename, mime_type=mime_type or "image/jpeg")
         print(f"Uploaded file '{file.display_name}' as: {file.uri}")
         return file
     finally:
         # Clean up the temporary file
         os.unlink(temp_filename)
 
+# "inline" sends a JPEG inside the generate_content request; "upload" goes through the Files API first
+IMAGE_MODE = os.environ.get("GEMINI_IMAGE_MODE", "inline")
+INLINE_MAX_EDGE = 1024
+INLINE_JPEG_QUALITY = 85
+
+
+def encode_inline(image, max_edge=INLINE_MAX_EDGE, quality=INLINE_JPEG_QUALITY):
+    """JPEG bytes for an inline image part. Already-encoded JPEG bytes pass through untouched."""
+    if isinstance(image, (bytes, bytearray)):
+        return bytes(image)
+    image = image.convert("RGB")
+    image.thumbnail((max_edge, max_edge))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def image_part(image, mode=None):
+    """Content part for `image` (a PIL image or JPEG bytes) in the configured mode, with its cost logged."""
+    mode = mode or IMAGE_MODE
+    start = time.perf_counter()
+    if mode == "upload":
+        part = upload_to_gemini(image)
+        size = None
+    else:
+        data = encode_inline(image)
+        part = {"mime_type": "image/jpeg", "data": data}
+        size = len(data)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"Gemini image part ({mode}): {f'{size / 1024:.0f} KB, ' if size else ''}ready in {elapsed_ms:.0f} ms")
+    return part
+
+# Set model generation parameters
+GENERATION_CONFIG = {
+    "temperature": 1.2,
+    "top_p": 0.95,
+    "top_k": 40,
+    "max_output_tokens": 8192,
+    "response_mime_type": "text/plain",
+}
+
+CHEF_PROMPT = """You are a comedic chef that is abbrasive and insulting, like Gordon Ramsey. Look at the provided image and the person or people in it. Choose one thing to criticize them about from a first person perspective. Refer to people as 'fucking muppets' or other such name calling. Insult their kitchen, ability to cook, and the appearnce of any food you see. Remember, that you should be abbrasive and insulting since that is what people will be expecting when they interact with you. Your responses should be given in a naturalistic spoken style using simple text and each sentence should be seperated by a blank line."""
+
+SAFETY_SETTINGS = {
+#    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+#    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+#    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
+#    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_ONLY_HIGH
+}
+
+# A sentence ends at a blank line (as the prompt asks for) or at terminal punctuation followed by whitespace
+SENTENCE_BOUNDARY = re.compile(r"\n\s*\n|(?<=[.!?])\s+")
+
+
+MODEL_NAME = "gemini-1.5-flash-002"  # You can change to another model if required
+
+
+class GeminiClient:
+    """One long-lived model, created once and shared by every request.
+
+    Also keeps the timings that tell where a slow answer comes from: `construct_ms` for
+    building the model, `warm_up()` for connection setup (a cold tiny request minus a
+    warm one), and per request the image part, time to first chunk and total generation.
+    """
+
+    def __init__(self, model_name=MODEL_NAME):
+        start = time.perf_counter()
+        self.model = genai.GenerativeModel(model_name=model_name, generation_config=GENERATION_CONFIG)
+        self.construct_ms = round((time.perf_counter() - start) * 1000, 1)
+        self.warmup = None
+        self.requests = 0
+        self.last_timings = None
+
+    def _tiny_request_ms(self):
+        start = time.perf_counter()
+        self.model.generate_content("Reply with OK.", generation_config={"max_output_tokens": 1})
+        return round((time.perf_counter() - start) * 1000, 1)
+
+    def warm_up(self):
+        """Open the connection with two tiny text requests; the difference is the setup cost."""
+        cold_ms = self._tiny_request_ms()
+        warm_ms = self._tiny_request_ms()
+        self.warmup = {"cold_ms": cold_ms, "warm_ms": warm_ms, "connection_ms": round(cold_ms - warm_ms, 1)}
+        print(f"Gemini warm-up: {self.warmup}")
+        return self.warmup
+
+    def generate(self, image, stream=False, stop=None):
+        """Ask for the chef's take on `image`. With `stream=True`, yields text chunks as they arrive.
+
+        Setting the `stop` event ends a stream at the next chunk, so an abandoned answer
+        stops occupying a worker thread.
+        """
+        start = time.perf_counter()
+        part = image_part(image)
+        sent = time.perf_counter()
+        timings = {"image_ms": round((sent - start) * 1000, 1)}
+        self.requests += 1
+
+        response = self.model.generate_content([CHEF_PROMPT, part], safety_settings=SAFETY_SETTINGS, stream=stream)
+        if not stream:
+            timings["generate_ms"] = round((time.perf_counter() - sent) * 1000, 1)
+            self._record(timings)
+            return response.text
+        return self._stream(response, sent, timings, stop)
+
+    def _stream(self, response, sent, timings, stop):
+        for chunk in response:
+            if stop is not None and stop.is_set():
+                # Dropping the response iterator cancels the underlying call
+                timings["stopped"] = True
+                break
+            if "first_chunk_ms" not in timings:
+                timings["first_chunk_ms"] = round((time.perf_counter() - sent) * 1000, 1)
+            yield chunk.text
+        timings["generate_ms"] = round((time.perf_counter() - sent) * 1000, 1)
+        self._record(timings)
+
+    def _record(self, timings):
+        self.last_timings = timings
+        print(f"Gemini timings: {timings}")
+
+    def stats(self) -> dict:
+        return {
+            "construct_ms": self.construct_ms,
+            "warmup": self.warmup,
+            "requests": self.requests,
+            "last_request": self.last_timings,
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_gemini_client():
+    """The shared `GeminiClient`, created on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GeminiClient()
+        return _client
+
+
 # Retry logic in case of resource exhaustion
 @weave.op
 @retry.Retry(predicate=retry.if_exception_type(exceptions.ResourceExhausted))
 def gemini_chat(image):
-    gemini_file = upload_to_gemini(image)
-    print(gemini_file)
-
-    # Set model generation parameters
-    generation_config = {
-        "temperature": 1.2,
-        "top_p": 0.95,
-        "top_k": 40,
-        "max_output_tokens": 8192,
-        "response_mime_type": "text/plain",
-    }
-
-    # Initialize the model
-    model = genai.GenerativeModel(
-        model_name="gemini-1.5-flash-002",  # You can change to another model if required
-        generation_config=generation_config,
-    )
-
     # Generate a response based on the image
-    response = model.generate_content([
-        """You are a comedic chef that is abbrasive and insulting, like Gordon Ramsey. Look at the provided image and the person or people in it. Choose one thing to criticize them about from a first person perspective. Refer to people as 'fucking muppets' or other such name calling. Insult their kitchen, ability to cook, and the appearnce of any food you see. Remember, that you should be abbrasive and insulting since that is what people will be expecting when they interact with you. Your responses should be given in a naturalistic spoken style using simple text and each sentence should be seperated by a blank line.""",
-        gemini_file,
-    ],
-    safety_settings={
-#        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_ONLY_HIGH,
-#        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
-#        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_ONLY_HIGH,
-#        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_ONLY_HIGH
-    })
-    
-    return response.text
+    return get_gemini_client().generate(image)
+
+
+def split_sentences(text_chunks):
+    """Regroup streamed text chunks into whole sentences, yielding each as soon as it is complete."""
+    pending = ""
+    for text in text_chunks:
+        pending += text
+        parts = SENTENCE_BOUNDARY.split(pending)
+        # The last part may still be growing
+        pending = parts.pop()
+        for part in parts:
+            if part.strip():
+                yield part.strip()
+    if pending.strip():
+        yield pending.strip()
+
+
+# Same retry as gemini_chat; it covers opening the stream and its first chunk, which is where quota errors show up
+@retry.Retry(predicate=retry.if_exception_type(exceptions.ResourceExhausted))
+def _open_chat_stream(image, stop=None):
+    chunks = get_gemini_client().generate(image, stream=True, stop=stop)
+    first = next(chunks, None)
+    return itertools.chain([] if first is None else [first], chunks)
+
+
+def gemini_chat_stream(image, stop=None):
+    """Like `gemini_chat`, but yields sentences while the model is still generating.
+
+    `image` may also be a callable returning the image, to defer its preparation to the first `next()`.
+    """
+    if callable(image):
+        image = image()
+    yield from split_sentences(_open_chat_stream(image, stop))
+
+
+_stream_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="gemini-stream")
+
+
+async def gemini_chat_sentences(image):
+    """Async view of `gemini_chat_stream`; the blocking upload and stream run in a worker thread.
+
+    If the consumer stops early or is cancelled, the Gemini stream is stopped and closed
+    too, once the `next()` in flight returns.
+    """
+    stop = threading.Event()
+    sentences = gemini_chat_stream(image, stop)
+    pending = None
+    try:
+        while True:
+            pending = _stream_executor.submit(next, sentences, None)
+            sentence = await asyncio.wrap_future(pending)
+            if sentence is None:
+                break
+            yield sentence
+    finally:
+        stop.set()
+        # The generator cannot be closed while a worker is inside it, so close it after that returns
+        if pending is not None:
+            pending.add_done_callback(lambda _: sentences.close())
+        else:
+            sentences.close()
+
+def compare_image_modes(image, runs=3):
+    """Time image preparation and the full request for the upload and inline paths on the same image."""
+    png = io.BytesIO()
+    image.save(png, format="PNG")
+    print(f"Payload: upload (PNG) {len(png.getvalue()) / 1024:.0f} KB, inline (JPEG) {len(encode_inline(image)) / 1024:.0f} KB")
+
+    model = get_gemini_client().model
+    for mode in ("upload", "inline"):
+        for run in range(runs):
+            start = time.perf_counter()
+            part = image_part(image, mode)
+            prepared = time.perf_counter()
+            model.generate_content([CHEF_PROMPT, part], safety_settings=SAFETY_SETTINGS)
+            done = time.perf_counter()
+            print(f"{mode} run {run + 1}: image {(prepared - start) * 1000:.0f} ms, "
+                  f"generate {(done - prepared) * 1000:.0f} ms, total {(done - start) * 1000:.0f} ms")
 
 # Main execution
 if __name__ == "__main__":
+    import sys
+
     # Load the image to analyze
-    img = Image.open("taken_image.jpg")
-    result = gemini_chat(img)
-    print(result)
+    img = Image.open("static/taken_image.jpg")
+    if "--compare" in sys.argv:
+        compare_image_modes(img)
+    else:
+        result = gemini_chat(img)
+        print(result)
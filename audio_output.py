@@ -0,0 +1,434 @@
+import asyncio
+import time
+import wave
+
+import numpy as np
+import pyaudio
+
+
+class PcmRingBuffer:
+    """Single-producer, single-consumer ring of int16 samples.
+
+    `write_pos` and `read_pos` are monotonically increasing sample counts. Only the
+    producer advances `write_pos` and only the consumer advances `read_pos`, each after
+    its copy is complete, so the network side and the audio callback never need a lock.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=np.int16)
+        self.write_pos = 0
+        self.read_pos = 0
+
+    @property
+    def fill(self) -> int:
+        return self.write_pos - self.read_pos
+
+    @property
+    def free(self) -> int:
+        return self.capacity - self.fill
+
+    def write(self, samples: np.ndarray) -> int:
+        """Copy as many samples as fit and return how many were written."""
+        n = min(len(samples), self.free)
+        start = self.write_pos % self.capacity
+        first = min(n, self.capacity - start)
+        self.buffer[start:start + first] = samples[:first]
+        self.buffer[:n - first] = samples[first:n]
+        self.write_pos += n
+        return n
+
+    def read_into(self, out: np.ndarray) -> int:
+        """Copy up to `len(out)` samples into `out` and return how many were read."""
+        n = min(len(out), self.fill)
+        start = self.read_pos % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self.buffer[start:start + first]
+        out[first:n] = self.buffer[:n - first]
+        self.read_pos += n
+        return n
+
+    def clear(self):
+        self.read_pos = self.write_pos
+
+
+class GainStage:
+    """Apply a fixed gain to int16 samples without allocating per chunk.
+
+    The multiply and clip run in a reusable float32 scratch buffer and the result is
+    written straight into the caller's destination view.
+    """
+
+    def __init__(self, gain: float, initial_samples: int = 8192):
+        self.gain = np.float32(gain)
+        self.scratch = np.empty(initial_samples, dtype=np.float32)
+
+    def process(self, samples: np.ndarray, out: np.ndarray) -> np.ndarray:
+        n = len(samples)
+        if n > len(self.scratch):
+            self.scratch = np.empty(max(n, 2 * len(self.scratch)), dtype=np.float32)
+        work = self.scratch[:n]
+        np.multiply(samples, self.gain, out=work)
+        np.clip(work, -32768, 32767, out=work)
+        np.copyto(out, work, casting="unsafe")
+        return out
+
+
+class PcmCapture:
+    """Growable int16 buffer that collects a whole utterance.
+
+    Space is preallocated and doubled when exhausted, so appending chunks is amortized
+    linear instead of the quadratic cost of concatenating bytes. Views handed out by
+    `append` stay valid after a resize because they keep the old array alive.
+    """
+
+    def __init__(self, initial_samples: int):
+        self.samples = np.empty(initial_samples, dtype=np.int16)
+        self.length = 0
+
+    def _reserve(self, n: int) -> np.ndarray:
+        needed = self.length + n
+        if needed > len(self.samples):
+            grown = np.empty(max(needed, 2 * len(self.samples)), dtype=np.int16)
+            grown[:self.length] = self.samples[:self.length]
+            self.samples = grown
+        return self.samples[self.length:needed]
+
+    def append(self, samples: np.ndarray, gain: GainStage | None = None) -> np.ndarray:
+        """Append samples (optionally through `gain`) and return a view of where they landed."""
+        out = self._reserve(len(samples))
+        if gain is None:
+            out[:] = samples
+        else:
+            gain.process(samples, out)
+        self.length += len(samples)
+        return out
+
+    def view(self) -> np.ndarray:
+        return self.samples[:self.length]
+
+    def as_bytes(self) -> memoryview:
+        return memoryview(self.view()).cast("B")
+
+
+class StreamingResampler:
+    """Vectorized linear-interpolation resampler that keeps its phase across chunks.
+
+    Output sample `k` sits at input position `k * in_rate / out_rate`, computed from
+    integer sample counts rather than an accumulated float phase, and the last input
+    sample of each chunk is carried into the next one. So a stream split into arbitrary
+    chunks resamples exactly as if it had arrived in one piece.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int):
+        self.in_rate = in_rate
+        self.out_rate = out_rate
+        self._src = np.empty(0, dtype=np.float32)
+        self._index = np.empty(0, dtype=np.int64)
+        self.reset()
+
+    @property
+    def passthrough(self) -> bool:
+        return self.in_rate == self.out_rate
+
+    def reset(self):
+        self.produced = 0  # Output samples emitted so far
+        self.consumed = 0  # Input samples received so far
+        self.last = None
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if self.passthrough or len(samples) == 0:
+            return samples
+
+        carry = 0 if self.last is None else 1
+        n_src = len(samples) + carry
+        base = self.consumed - carry  # Stream index of src[0]
+        self.consumed += len(samples)
+        # Emit every output whose position is at or before the newest input sample
+        end = ((self.consumed - 1) * self.out_rate) // self.in_rate + 1
+        count = end - self.produced
+        if n_src > len(self._src):
+            self._src = np.empty(2 * n_src, dtype=np.float32)
+        if count > len(self._index):
+            self._index = np.arange(2 * count, dtype=np.int64)
+
+        src = self._src[:n_src]
+        if carry:
+            src[0] = self.last
+        src[carry:] = samples
+
+        numer = (self.produced + self._index[:count]) * self.in_rate
+        left = numer // self.out_rate - base
+        right = np.minimum(left + 1, n_src - 1)
+        frac = (numer % self.out_rate) / self.out_rate
+        out = (src[left] + (src[right] - src[left]) * frac).astype(np.int16)
+
+        self.produced = end
+        self.last = src[-1]
+        return out
+
+
+def load_wav(path: str, rate: int) -> np.ndarray:
+    """Decode a PCM WAV file to mono int16 at `rate`."""
+    with wave.open(path, "rb") as wav:
+        channels = wav.getnchannels()
+        sample_width = wav.getsampwidth()
+        source_rate = wav.getframerate()
+        frames = wav.readframes(wav.getnframes())
+
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.int16) - 128) << 8
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype=np.int16)
+    elif sample_width == 4:
+        samples = (np.frombuffer(frames, dtype=np.int32) >> 16).astype(np.int16)
+    else:
+        raise ValueError(f"Unsupported sample width {sample_width} in {path}")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1).astype(np.int16)
+
+    if source_rate != rate:
+        positions = np.arange(int(len(samples) * rate / source_rate)) * (source_rate / rate)
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.int16)
+
+    return np.ascontiguousarray(samples)
+
+
+class AudioEngine:
+    """Single PyAudio output that mixes a speech bus and a music bus in numpy blocks.
+
+    Speech is pushed into a `PcmRingBuffer` and pulled by the callback, so writers never
+    block on the device and the network receive can run ahead of playback. Each utterance
+    is pre-buffered up to `prebuffer_ms` before the callback starts draining it; if the
+    ring runs dry before the utterance has ended, the underrun is counted and the engine
+    re-buffers.
+
+    Music is read from an int16 array in the same callback. Its gain follows two per-sample
+    envelopes: a ducking envelope that drops to `duck_gain` as soon as speech is mixed into
+    a block and recovers after `duck_hold_ms` of silence, and a fade envelope for
+    `fade_out_music`.
+    """
+
+    def __init__(
+        self,
+        rate: int = 44100,
+        frames_per_buffer: int = 1024,
+        prebuffer_ms: float = 150,
+        capacity_s: float = 30,
+        duck_gain: float = 0.3,
+        duck_attack_ms: float = 150,
+        duck_release_ms: float = 1000,
+        duck_hold_ms: float = 750,
+    ):
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.prebuffer_samples = int(prebuffer_ms * rate / 1000)
+        self.ring = PcmRingBuffer(int(capacity_s * rate))
+
+        self.duck_gain = duck_gain
+        self.duck_attack_step = (1.0 - duck_gain) / max(1, duck_attack_ms * rate / 1000)
+        self.duck_release_step = (1.0 - duck_gain) / max(1, duck_release_ms * rate / 1000)
+        self.duck_hold_samples = int(duck_hold_ms * rate / 1000)
+        self.duck_level = 1.0
+        self.samples_since_speech = self.duck_hold_samples
+
+        self.music = None
+        self.music_pos = 0
+        self.music_loop = False
+        self.music_level = 1.0
+        self.music_target = 1.0
+        self.music_step = 0.0
+
+        self._allocate_blocks(frames_per_buffer)
+
+        self.playing = False
+        self.ending = True
+        self._reset_stats()
+
+        self.p = pyaudio.PyAudio()
+        self.stream = self.p.open(
+            format=pyaudio.paInt16,
+            channels=1,
+            rate=rate,
+            output=True,
+            frames_per_buffer=frames_per_buffer,
+            stream_callback=self._callback,
+        )
+        self.stream.start_stream()
+
+    def _allocate_blocks(self, frames: int):
+        self._speech = np.zeros(frames, dtype=np.int16)
+        self._music = np.zeros(frames, dtype=np.int16)
+        self._mix = np.zeros(frames, dtype=np.float32)
+        self._gain = np.zeros(frames, dtype=np.float32)
+        self._fade = np.zeros(frames, dtype=np.float32)
+        self._ramp = np.arange(1, frames + 1, dtype=np.float32)
+        self._out = np.zeros(frames, dtype=np.int16)
+
+    def _reset_stats(self):
+        self.speech_started_at = None
+        self.underruns = 0
+        self.callbacks = 0
+        self.fill_sum = 0
+        self.fill_min = None
+        self.fill_max = 0
+
+    def _envelope(self, out: np.ndarray, current: float, target: float, step: float) -> float:
+        """Fill `out` with a linear ramp from `current` towards `target` and return where it ends."""
+        if current == target or step <= 0:
+            out.fill(target if step <= 0 else current)
+            return float(out[-1])
+        if target > current:
+            np.multiply(self._ramp[:len(out)], step, out=out)
+            out += current
+            np.minimum(out, target, out=out)
+        else:
+            np.multiply(self._ramp[:len(out)], -step, out=out)
+            out += current
+            np.maximum(out, target, out=out)
+        return float(out[-1])
+
+    def _read_speech(self, out: np.ndarray) -> int:
+        fill = self.ring.fill
+        if not self.playing and fill > 0 and (fill >= self.prebuffer_samples or self.ending):
+            self.playing = True
+            if self.speech_started_at is None:
+                self.speech_started_at = time.perf_counter()
+
+        if not self.playing:
+            return 0
+
+        self.callbacks += 1
+        self.fill_sum += fill
+        self.fill_min = fill if self.fill_min is None else min(self.fill_min, fill)
+        self.fill_max = max(self.fill_max, fill)
+
+        n = self.ring.read_into(out)
+        if n < len(out):
+            if not self.ending:
+                self.underruns += 1
+            # Either the utterance is over or we ran dry: wait for the next prebuffer
+            self.playing = False
+        return n
+
+    def _read_music(self, out: np.ndarray) -> int:
+        music = self.music
+        if music is None or not len(music):
+            return 0  # An empty looped track would never advance
+
+        n = 0
+        while n < len(out):
+            take = min(len(out) - n, len(music) - self.music_pos)
+            out[n:n + take] = music[self.music_pos:self.music_pos + take]
+            n += take
+            self.music_pos += take
+            if self.music_pos >= len(music):
+                if not self.music_loop:
+                    self.music = None
+                    break
+                self.music_pos = 0
+        return n
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        if frame_count > len(self._out):
+            self._allocate_blocks(frame_count)
+        mix = self._mix[:frame_count]
+        mix.fill(0)
+
+        speech = self._speech[:frame_count]
+        speech_n = self._read_speech(speech)
+        if speech_n:
+            mix[:speech_n] = speech[:speech_n]
+            self.samples_since_speech = frame_count - speech_n
+        else:
+            self.samples_since_speech += frame_count
+
+        music = self._music[:frame_count]
+        music_n = self._read_music(music)
+        if music_n:
+            # Duck on speech onset, release once speech has been quiet for the hold time
+            gain = self._gain[:music_n]
+            if self.samples_since_speech < self.duck_hold_samples:
+                self.duck_level = self._envelope(gain, self.duck_level, self.duck_gain, self.duck_attack_step)
+            else:
+                self.duck_level = self._envelope(gain, self.duck_level, 1.0, self.duck_release_step)
+
+            fade = self._fade[:music_n]
+            self.music_level = self._envelope(fade, self.music_level, self.music_target, self.music_step)
+            gain *= fade
+            gain *= music[:music_n]
+            mix[:music_n] += gain
+
+            if self.music_target == 0.0 and self.music_level <= 0.0:
+                self.music = None
+
+        out = self._out[:frame_count]
+        np.clip(mix, -32768, 32767, out=mix)
+        np.copyto(out, mix, casting="unsafe")
+        return out.tobytes(), pyaudio.paContinue
+
+    def play_music(self, samples: np.ndarray, loop: bool = False, volume: float = 1.0, start: int = 0):
+        """Start mixing `samples` (mono int16 at the engine rate) into the music bus from sample `start`.
+
+        With `loop`, the callback wraps straight back to the first sample, so looping is gapless.
+        """
+        self.music = None
+        if not len(samples):
+            print("Ignoring empty music track")
+            return
+        self.music_pos = start % len(samples)
+        self.music_loop = loop
+        self.music_level = volume
+        self.music_target = volume
+        self.music_step = 0.0
+        self.music = samples
+
+    def fade_out_music(self, duration_ms: float):
+        """Fade the music bus to silence over `duration_ms`, then stop it."""
+        self.music_step = self.music_level / max(1, duration_ms * self.rate / 1000)
+        self.music_target = 0.0
+
+    def stop_music(self):
+        self.music = None
+
+    @property
+    def music_playing(self) -> bool:
+        return self.music is not None
+
+    def begin_utterance(self):
+        self._reset_stats()
+        self.ending = False
+
+    def end_utterance(self):
+        self.ending = True
+
+    async def write(self, samples: np.ndarray) -> int:
+        """Queue speech samples for playback and return the ring position of the first one."""
+        start = self.ring.write_pos
+        written = 0
+        while written < len(samples):
+            written += self.ring.write(samples[written:])
+            if written < len(samples):
+                await asyncio.sleep(0.01)
+        return start
+
+    async def wait_drained(self):
+        while (self.ring.fill > 0 or self.playing) and self.stream.is_active():
+            await asyncio.sleep(0.01)
+
+    def stats(self) -> dict:
+        to_ms = 1000 / self.rate
+        return {
+            "underruns": self.underruns,
+            "fill_min_ms": (self.fill_min or 0) * to_ms,
+            "fill_max_ms": self.fill_max * to_ms,
+            "fill_mean_ms": (self.fill_sum / self.callbacks * to_ms) if self.callbacks else 0.0,
+        }
+
+    def close(self):
+        if self.stream:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+        self.p.terminate()
@@ -1,12 +1,51 @@
+import os
 import cv2
 from PIL import Image
 import threading
+import time
+import numpy as np
+
+class Frame:
+    """A captured BGR frame, with RGB and PIL versions computed only if somebody asks.
+
+    `bgr` is a read-only view into the camera's buffer ring. It stays valid until the
+    camera has captured `Camera.buffers` more frames, so call `copy()` to keep it longer.
+    """
+
+    __slots__ = ("bgr", "timestamp", "_rgb", "_pil")
+
+    def __init__(self, bgr, timestamp):
+        self.bgr = bgr
+        self.timestamp = timestamp
+        self._rgb = None
+        self._pil = None
+
+    @property
+    def rgb(self):
+        if self._rgb is None:
+            self._rgb = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB)
+        return self._rgb
+
+    def to_pil(self):
+        if self._pil is None:
+            self._pil = Image.fromarray(self.rgb)
+        return self._pil
+
+    def copy(self):
+        return Frame(self.bgr.copy(), self.timestamp)
 
 class Camera:
-    def __init__(self):
+    def __init__(self, width=None, height=None, fps=None, fourcc=None, buffers=4):
         self.camera = None
         self.lock = threading.Lock()
         self.is_running = False
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.buffers = buffers
+        self._ring = None
+        self._next = 0
 
     def start(self):
         with self.lock:
@@ -15,9 +54,32 @@ class Camera:
                 if not self.camera.isOpened():
                     print("Error: Could not open camera")
                     return False
+                self._configure()
             self.is_running = True
         return True
 
+    def _configure(self):
+        # FOURCC first: some drivers only offer larger modes/higher FPS with MJPG
+        if self.fourcc:
+            self.camera.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+        if self.width:
+            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        if self.height:
+            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        if self.fps:
+            self.camera.set(cv2.CAP_PROP_FPS, self.fps)
+        # Keep at most one frame queued in the driver so a grab never returns a stale frame
+        self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        width = int(self.camera.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.camera.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        print(f"Camera running at {width}x{height} @ {self.camera.get(cv2.CAP_PROP_FPS):.0f} fps")
+        self._allocate((height, width, 3))
+
+    def _allocate(self, shape):
+        self._ring = np.zeros((self.buffers,) + tuple(shape), dtype=np.uint8)
+        self._next = 0
+
     def stop(self):
         with self.lock:
             self.is_running = False
@@ -25,23 +87,133 @@ class Camera:
                 self.camera.release()
                 self.camera = None
 
-    def capture_image(self):
+    def read_frame(self):
+        """Capture straight into the next preallocated buffer and return it as a `Frame`.
+
+        The timestamp is taken when the grab starts. With the driver buffer at one frame
+        and the grabber draining it continuously, the frame is at most one frame
+        interval older than that.
+        """
         with self.lock:
             if not self.is_running or self.camera is None:
                 return None
-            ret, frame = self.camera.read()
+            buffer = self._ring[self._next]
+            started = time.time()
+            ret = self.camera.grab()
             if ret:
-                return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-            else:
+                ret, frame = self.camera.retrieve(buffer)
+            if not ret:
                 print("Error: Could not capture frame with OpenCV")
                 return None
+            if frame is not buffer and frame.base is not buffer:
+                # The driver handed back a different size than it reported; follow it
+                self._allocate(frame.shape)
+                buffer = self._ring[0]
+                buffer[...] = frame
+            self._next = (self._next + 1) % self.buffers
+
+        view = buffer.view()
+        view.flags.writeable = False
+        return Frame(view, started)
+
+    def capture_image(self):
+        frame = self.read_frame()
+        return frame.to_pil() if frame is not None else None
 
     def isOpened(self):
         with self.lock:
             return self.camera is not None and self.camera.isOpened() and self.is_running
 
+class FrameBroadcast:
+    """Single-producer, multi-consumer holder of the newest frame.
+
+    Each published frame gets a sequence number. Consumers remember the last sequence
+    they saw and block on a condition variable until a newer one exists, so any number
+    of subscribers each see every new frame at most once, nobody consumes frames from
+    anybody else, and idle subscribers cost nothing while they wait.
+    """
+
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.frame = None
+        self.seq = 0
+        self.timestamp = None
+
+    def publish(self, frame, timestamp=None):
+        with self.cond:
+            self.frame = frame
+            self.timestamp = timestamp if timestamp is not None else time.time()
+            self.seq += 1
+            self.cond.notify_all()
+
+    def latest(self):
+        """Return `(seq, frame)` for the newest frame without waiting."""
+        with self.cond:
+            return self.seq, self.frame
+
+    def wait_next(self, last_seq, timeout=None):
+        """Wait for a frame newer than `last_seq` and return `(seq, frame)`.
+
+        On timeout, returns `(last_seq, None)`.
+        """
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.seq > last_seq, timeout):
+                return last_seq, None
+            return self.seq, self.frame
+
+    def wait_since(self, timestamp, timeout=None):
+        """Wait for a frame captured at or after `timestamp` (a `time.time()` value).
+
+        Returns the frame, or None on timeout.
+        """
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.timestamp is not None and self.timestamp >= timestamp, timeout):
+                return None
+            return self.frame
+
+class CameraGrabber:
+    """Thread that keeps grabbing from the camera and publishes every frame to a `FrameBroadcast`.
+
+    It is the only reader of the camera, so nobody else waits on `Camera.lock`, and
+    the driver queue is always drained. Snapshots come from the broadcast instead.
+    """
+
+    def __init__(self, camera, broadcast):
+        self.camera = camera
+        self.broadcast = broadcast
+        self.running = False
+        self.thread = None
+        self.errors = 0
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="camera-grabber", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def _run(self):
+        # grab() blocks until the camera delivers the next frame, so no sleep is needed
+        while self.running and self.camera.isOpened():
+            frame = self.camera.read_frame()
+            if frame is None:
+                self.errors += 1
+                time.sleep(0.1)
+                continue
+            self.broadcast.publish(frame, frame.timestamp)
+
 def get_camera():
-    return Camera()
+    return Camera(
+        width=int(os.getenv("CAMERA_WIDTH", "0")) or None,
+        height=int(os.getenv("CAMERA_HEIGHT", "0")) or None,
+        fps=int(os.getenv("CAMERA_FPS", "0")) or None,
+        fourcc=os.getenv("CAMERA_FOURCC") or None,
+    )
 
 if __name__ == "__main__":
     camera = get_camera()
@@ -1,62 +1,206 @@
 import os
 import asyncio
 import numpy as np
-import pyaudio
 from cartesia import AsyncCartesia
-from typing import AsyncGenerator, Dict, Union, Optional
+from typing import AsyncGenerator, AsyncIterator, Dict, List, Union, Optional
 from dotenv import load_dotenv
 from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 
 # from skeleton_control import SkeletonControl
 import time 
-import pygame
 load_dotenv()
 
 # Import the new ChefPuppetControl instead of SkeletonControl
 from chef_puppet_control import ChefPuppetControl
+from audio_output import AudioEngine, GainStage, PcmCapture, StreamingResampler
+from tts_cache import TtsCache
+from utterance_archive import UtteranceArchiver
+from tts_metrics import UtteranceMetrics
 
 class CartesiaStreamingClient:
-    def __init__(self, puppet: Optional[ChefPuppetControl] = None):
+    """Long-lived TTS service.
+
+    Create it once (e.g. in the FastAPI lifespan) and reuse it for every utterance: the
+    output device, the executor and the websocket stay open between calls, and each
+    utterance only opens a new context on the warm websocket.
+    """
+
+    def __init__(
+        self,
+        puppet: Optional[ChefPuppetControl] = None,
+        prebuffer_ms: float = 150,
+        cache: Optional[TtsCache] = None,
+        engine: Optional[AudioEngine] = None,
+        sample_rate: Optional[int] = None,
+        device_rate: int = 44100,
+        archiver: Optional[UtteranceArchiver] = None,
+    ):
         self.api_key = os.environ.get("CARTESIA_API_KEY")
         self.client = AsyncCartesia(api_key=self.api_key)
         self.voice_id = "1df86052-512c-4d8e-b933-f955b27f7f42"
         self.model_id = "sonic-english"
-        self.rate = 44100
+        # Rate requested from Cartesia; lower rates cut websocket bytes, per-chunk numpy work and
+        # lip-sync cost. Playback is resampled to the device rate independently.
+        self.rate = sample_rate or int(os.environ.get("TTS_SAMPLE_RATE", 44100))
         self.talk_speed = 'slow'
+        self.volume_multiplier = 1.2
 
         self.puppet = puppet
         self.audio_playing = False
-        self.p = pyaudio.PyAudio()
-        self.audio_stream = self.p.open(
-            format=pyaudio.paInt16,
-            channels=1,
-            rate=self.rate,
-            output=True,
-            frames_per_buffer=4096,
-        )
-        self.executor = ThreadPoolExecutor(max_workers=2)
-        pygame.mixer.init()
+        # Speech shares the engine's single output stream with the background music bus
+        self._owns_engine = engine is None
+        self.engine = engine if engine is not None else AudioEngine(rate=device_rate, prebuffer_ms=prebuffer_ms)
+        self.resampler = StreamingResampler(self.rate, self.engine.rate)
+        self.gain = GainStage(self.volume_multiplier)
+        self.capture = None
+        # A single worker keeps lip-sync chunks in playback order
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self._mouth_jobs = []
+        self.cache = cache if cache is not None else TtsCache()
+        self.cached_chunk_samples = int(0.1 * self.rate)
+        self.archiver = archiver
+        self.last_record = None  # Archive reference for the most recent utterance
+        self.last_metrics = None
+        self.metrics_history = deque(maxlen=50)
+
+        self.ws = None
+        self._ws_loop = None
+
+    async def start(self):
+        """Open the websocket ahead of the first utterance so it is warm when needed."""
+        await self._ensure_websocket()
+
+    async def _ensure_websocket(self):
+        """Return an open websocket, reconnecting if it was closed or belongs to another event loop."""
+        loop = asyncio.get_running_loop()
+        if self.ws is not None and self._ws_loop is loop and self._websocket_is_open(self.ws):
+            return self.ws
+
+        if self._ws_loop is not loop:
+            # aiohttp sessions are bound to the loop that created them, so a new loop needs a new client
+            self.ws = None
+            self.client = AsyncCartesia(api_key=self.api_key)
+        else:
+            await self._reset_websocket()
+
+        self.ws = await self.client.tts.websocket()
+        self._ws_loop = loop
+        return self.ws
+
+    async def _reset_websocket(self):
+        ws, self.ws = self.ws, None
+        if ws is not None and self._ws_loop is asyncio.get_running_loop():
+            try:
+                await ws.close()
+            except Exception as e:
+                print(f"Error closing TTS websocket: {e}")
+
+    @staticmethod
+    def _websocket_is_open(ws) -> bool:
+        connection = getattr(ws, "websocket", None)
+        return connection is not None and not connection.closed
+
+    def _output_format(self) -> Dict:
+        return {
+            "container": "raw",
+            "encoding": "pcm_s16le",
+            "sample_rate": self.rate,
+        }
+
+    def _cache_key(self, text: str) -> str:
+        return TtsCache.make_key(text, self.voice_id, self.model_id, self.rate, self.talk_speed, self.volume_multiplier)
+
+    def _begin_utterance(self, text: str):
+        self.engine.begin_utterance()
+        self.resampler.reset()
+        self._mouth_jobs = []
+        self.last_record = self.archiver.begin(text, self.rate) if self.archiver else None
+        self.last_metrics = UtteranceMetrics(text=text, sample_rate=self.rate)
+        self.metrics_history.append(self.last_metrics)
+
+    async def _finish_utterance(self):
+        # Network receive may have finished well ahead of playback
+        self.engine.end_utterance()
+        await self.engine.wait_drained()
+        await asyncio.gather(*self._mouth_jobs, return_exceptions=True)
+        self.last_metrics.finish(self.engine.speech_started_at, self.engine.stats())
+        print(f"TTS metrics: {self.last_metrics.summary()}")
+        if self.last_record:
+            self.archiver.finish(self.last_record)
+
+        # Ensure the mouth is closed after streaming is complete; the servo write runs on the
+        # mouth worker so it stays ordered after the last mouth movement and off the event loop
+        if self.puppet:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.puppet.stop_mouth_movement)
 
     async def stream_tts(self, text: str, use_sse: bool = False):
+        self._begin_utterance(text)
         try:
-            output_format = {
-                "container": "raw",
-                "encoding": "pcm_s16le",
-                "sample_rate": self.rate,
-            }
-            all_chunks = b''
+            cache_key = self._cache_key(text)
+            cached = self.cache.get(cache_key) if self.cache else None
+            if cached is not None:
+                self.last_metrics.cache_hit = True
+                self.last_metrics.mark_request()
+                # Cached audio already has gain applied; play the memory map directly
+                for start in range(0, len(cached), self.cached_chunk_samples):
+                    await self._play(cached[start:start + self.cached_chunk_samples])
+                return memoryview(cached).cast("B")
+
+            # Room for ~10 s of speech up front; grows by doubling for longer utterances
+            self.capture = PcmCapture(10 * self.rate)
+            output_format = self._output_format()
             if use_sse:
                 async for chunk in self._stream_sse(text, output_format):
-                    all_chunks += await self._handle_chunk(chunk)
+                    await self._handle_chunk(chunk)
             else:
                 async for chunk in self._stream_websocket(text, output_format):
-                    all_chunks += await self._handle_chunk(chunk)
-            return all_chunks
+                    await self._handle_chunk(chunk)
+
+            if self.cache:
+                # Temp file, rename and eviction touch the disk; keep them off the event loop
+                await asyncio.to_thread(self.cache.put, cache_key, self.capture.as_bytes())
+            return self.capture.as_bytes()
         
         finally:
-            # Ensure the mouth is closed after streaming is complete
-            if self.puppet:
-                self.puppet.stop_mouth_movement()
+            await self._finish_utterance()
+
+    async def stream_tts_incremental(self, sentences: AsyncIterator[str]):
+        """Speak sentences as they are produced, all in one Cartesia context.
+
+        Each sentence is sent as a continuation of the previous ones, so the first
+        sentence plays while later ones are still being generated and the voice keeps
+        its prosody across sentence boundaries.
+        """
+        spoken = []
+        self._begin_utterance("")
+        try:
+            self.capture = PcmCapture(10 * self.rate)
+            async for chunk in self._stream_websocket_incremental(sentences, spoken, self._output_format()):
+                await self._handle_chunk(chunk)
+            return self.capture.as_bytes()
+        finally:
+            self.last_metrics.text = " ".join(spoken)
+            if self.last_record:
+                self.last_record.text = self.last_metrics.text
+            await self._finish_utterance()
+
+    async def prewarm(self, texts):
+        """Synthesize any of `texts` that are not cached yet, without playing them."""
+        if not self.cache:
+            return
+        for text in texts:
+            cache_key = self._cache_key(text)
+            if cache_key in self.cache.index:
+                continue
+            try:
+                capture = PcmCapture(10 * self.rate)
+                async for chunk in self._stream_websocket(text, self._output_format()):
+                    capture.append(np.frombuffer(chunk['audio'], dtype=np.int16), self.gain)
+                await asyncio.to_thread(self.cache.put, cache_key, capture.as_bytes())
+                print(f"Pre-warmed TTS cache for: {text!r}")
+            except Exception as e:
+                print(f"Error pre-warming TTS cache for {text!r}: {e}")
 
     async def _stream_sse(self, text: str, output_format: Dict) -> AsyncGenerator[Dict[str, Union[bytes, float]], None]:
         async with self.client.tts.stream(
@@ -70,46 +214,105 @@ class CartesiaStreamingClient:
                 timestamp = asyncio.get_event_loop().time() - start_time
                 yield {"audio": chunk, "timestamp": timestamp}
 
+    async def _open_context(self, text: str, output_format: Dict, continue_: bool = False):
+        """Open a per-utterance context on the shared websocket, reconnecting once if the send fails."""
+        for attempt in range(2):
+            ws = await self._ensure_websocket()
+            ctx = ws.context()
+            try:
+                await ctx.send(
+                    model_id=self.model_id,
+                    transcript=text,
+                    voice_id=self.voice_id,
+                    continue_=continue_,
+                    add_timestamps=True,
+                    output_format=output_format,
+                )
+                if self.last_metrics:
+                    self.last_metrics.mark_request()
+                return ctx
+            except Exception as e:
+                print(f"TTS websocket send failed (attempt {attempt + 1}/2): {e}")
+                await self._reset_websocket()
+                if attempt == 1:
+                    raise
+
     async def _stream_websocket(self, text: str, output_format: Dict) -> AsyncGenerator[Dict[str, Union[bytes, float]], None]:
-        ws = await self.client.tts.websocket()
-        ctx = ws.context()
+        ctx = await self._open_context(text, output_format)
 
         try:
-            await ctx.send(
-                model_id=self.model_id,
-                transcript=text,
-                voice_id=self.voice_id,
-                continue_=False,
-                add_timestamps=True,
-                output_format=output_format,
-            )            
-
             start_time = asyncio.get_event_loop().time()
-            # Import pygame and initialize the mixer
 
-            def fade_music(target_volume, duration_ms, steps=100):
-                """Fade the music volume to the target_volume over duration_ms milliseconds."""
-                current_volume = pygame.mixer.music.get_volume()
-                volume_difference = current_volume - target_volume
-                delay = duration_ms / steps / 1000.0  # Convert milliseconds to seconds
-                for i in range(steps):
-                    # Calculate the new volume
-                    new_volume = current_volume - (volume_difference * (i + 1) / steps)
-                    pygame.mixer.music.set_volume(new_volume)
-                    time.sleep(delay)
+            async for response in ctx.receive():
+                
+                if response.get('audio'):
+                    audio_data_bytes = self._extract_audio_bytes(response['audio'])
+                    if audio_data_bytes:
+                        timestamp = asyncio.get_event_loop().time() - start_time
+                        yield {"audio": audio_data_bytes, "timestamp": timestamp}
+        except Exception:
+            # Drop a websocket that failed mid-utterance; the next utterance reconnects
+            await self._reset_websocket()
+            raise
 
-            fade_music(0.3, 1000)
+    async def _stream_websocket_incremental(
+        self, sentences: AsyncIterator[str], spoken: List[str], output_format: Dict
+    ) -> AsyncGenerator[Dict[str, Union[bytes, float]], None]:
+        sentences = aiter(sentences)
 
+        # Only open a context once there is something to say
+        first = None
+        async for sentence in sentences:
+            if sentence.strip():
+                first = sentence.strip()
+                break
+        if first is None:
+            return
+
+        # Continuation transcripts are joined as-is, so each one ends with a space
+        spoken.append(first)
+        ctx = await self._open_context(first + " ", output_format, continue_=True)
+
+        async def feed():
+            try:
+                async for sentence in sentences:
+                    sentence = sentence.strip()
+                    if not sentence:
+                        continue
+                    spoken.append(sentence)
+                    await ctx.send(
+                        model_id=self.model_id,
+                        transcript=sentence + " ",
+                        voice_id=self.voice_id,
+                        continue_=True,
+                        add_timestamps=True,
+                        output_format=output_format,
+                    )
+            finally:
+                # Always close the input side so receive() ends even if generation failed
+                await ctx.no_more_inputs()
+
+        feeder = asyncio.create_task(feed())
+        received = False
+        try:
+            start_time = asyncio.get_event_loop().time()
             async for response in ctx.receive():
-                
                 if response.get('audio'):
                     audio_data_bytes = self._extract_audio_bytes(response['audio'])
                     if audio_data_bytes:
                         timestamp = asyncio.get_event_loop().time() - start_time
                         yield {"audio": audio_data_bytes, "timestamp": timestamp}
+            received = True
+        except Exception:
+            # Drop a websocket that failed mid-utterance; the next utterance reconnects
+            await self._reset_websocket()
+            raise
         finally:
-            await ws.close()
-            await self.client.close()
+            if not received:
+                feeder.cancel()
+
+        # Surface any error from the sentence source once the audio has been played
+        await feeder
 
     @staticmethod
     def _extract_audio_bytes(audio_buffer):
@@ -122,34 +325,47 @@ class CartesiaStreamingClient:
         return None
 
     async def _handle_chunk(self, chunk: Dict[str, Union[bytes, float]]):
-        audio_data = np.frombuffer(chunk['audio'], dtype=np.int16)
-        volume_multiplier = 1.2
-        audio_data = (audio_data * volume_multiplier).astype(np.int16)
+        # Read the websocket payload in place and write the gained samples straight into the capture buffer
+        audio_data = self.capture.append(np.frombuffer(chunk['audio'], dtype=np.int16), self.gain)
+        await self._play(audio_data)
+        return audio_data
 
-        # Print audio statistics
-        max_amplitude = np.max(np.abs(audio_data))
-        mean_amplitude = np.mean(np.abs(audio_data))
-        print(f"Audio chunk - Max amplitude: {max_amplitude}, Mean amplitude: {mean_amplitude}")
+    async def _play(self, audio_data: np.ndarray):
+        self.last_metrics.mark_chunk(len(audio_data))
 
-        # Play audio
-        self.audio_stream.write(audio_data.tobytes())
+        # Capture views and cache maps are never written again, so the archiver can take them as-is
+        if self.last_record:
+            self.archiver.append(self.last_record, audio_data)
 
-        # Move puppet mouth if instance is provided
+        # Queue for playback at the device rate; the audio callback drains it without blocking the event loop
+        start_pos = await self.engine.write(self.resampler.process(audio_data))
+
+        # Move puppet mouth in step with playback if instance is provided
         if self.puppet:
-            # Use run_in_executor to run the synchronous move_mouth method
             loop = asyncio.get_running_loop()
-            await loop.run_in_executor(self.executor, self.puppet.move_mouth, audio_data.tobytes())
+            self._mouth_jobs.append(
+                loop.run_in_executor(self.executor, self._move_mouth_when_played, start_pos, memoryview(audio_data))
+            )
+
+    def _move_mouth_when_played(self, start_pos: int, audio_buffer: memoryview, max_wait: float = 5.0):
+        """Wait until playback reaches a chunk, then animate the mouth for it."""
+        metrics = self.last_metrics
+        lag_samples = self.engine.ring.read_pos - start_pos
+        if lag_samples > 0:
+            # Playback already passed this chunk: lip-sync is running behind the audio
+            metrics.mark_mouth_lag(lag_samples / self.engine.rate)
 
-        print(f"Timestamp: {chunk['timestamp']:.2f}s")
-        return audio_data.tobytes()
+        deadline = time.monotonic() + max_wait
+        while self.engine.ring.read_pos < start_pos and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self.puppet.move_mouth(audio_buffer, sample_rate=self.rate)
 
     async def close(self):
-        if self.audio_stream:
-            self.audio_stream.stop_stream()
-            self.audio_stream.close()
+        await self._reset_websocket()
+        if self._owns_engine:
+            self.engine.close()
         if self.puppet:
-            self.puppet.stop_mouth_movement()
-        self.p.terminate()
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.puppet.stop_mouth_movement)
         self.executor.shutdown()
         if self.client:
             await self.client.close()
@@ -157,6 +373,7 @@ class CartesiaStreamingClient:
 async def test_streaming(use_sse: bool = False):
     puppet = ChefPuppetControl()
     client = CartesiaStreamingClient(puppet=puppet)
+    await client.start()
 
     try:
         puppet.start_body_movement()
@@ -3,9 +3,10 @@ import threading
 import numpy as np
 import yaml
 from lerobot.common.robot_devices.motors.feetech import FeetechMotorsBus
+from feetech import FeetechMultiPortBus
 
 class ChefPuppetControl:
-    def __init__(self):
+    def __init__(self, servo_ports=None):
         self.motor_name = "servo6"  # Mouth servo
         self.motor_index = 6
         self.motor_model = "sts3215"
@@ -14,11 +15,6 @@ class ChefPuppetControl:
         self.mouth_open_position = 1800
         self.mouth_closed_position = 1200
 
-        self.motors_bus = FeetechMotorsBus(
-            port=self.port,
-            motors={self.motor_name: (self.motor_index, self.motor_model)},
-        )
-
         self.closed_position = self.mouth_closed_position
         self.open_positions = [self.mouth_open_position]  # Various open positions
 
@@ -38,26 +34,46 @@ class ChefPuppetControl:
             "servo6": (6, "sts3215"),
         }
 
+        # Which serial adapter each servo is wired to. Splitting servos across several
+        # adapters gives each its own I/O thread, so every port adds bus bandwidth.
+        self.servo_ports = servo_ports or {self.port: list(self.all_servos)}
+
+        self.motors_bus = FeetechMultiPortBus(
+            ports={
+                port: {servo_name: self.all_servos[servo_name] for servo_name in servo_names}
+                for port, servo_names in self.servo_ports.items()
+            },
+        )
+
         self._connect_motors()
 
     def _connect_motors(self):
         try:
-            print(f"Attempting to connect to {self.motor_name} on port {self.port}")
+            print(f"Attempting to connect to {len(self.all_servos)} servos on ports {list(self.servo_ports)}")
             self.motors_bus.connect()
             print(f"Connected successfully. Setting baudrate to {self.baudrate}")
             self.motors_bus.set_bus_baudrate(self.baudrate)
         except Exception as e:
             print(f"An error occurred while connecting to motors: {str(e)}")
 
-    def move_mouth(self, audio_buffer):
+    def _servo_port(self, servo_name):
+        """Return the serial port a servo is wired to."""
+        return self.motors_bus.motor_ports.get(servo_name, self.port)
+
+    def move_mouth(self, audio_buffer, sample_rate=44100):
         """Move mouth based on audio buffer, analyzing smaller segments within the chunk."""
-        sample_rate = 44100  # Hz
-        audio_data = np.frombuffer(audio_buffer, dtype=np.int16).astype(np.float32)
-        audio_data /= np.max(np.abs(audio_data))  # Normalize
+        samples = np.frombuffer(audio_buffer, dtype=np.int16)
+        if len(samples) == 0:
+            return
 
         segment_size = int(self.segment_duration * sample_rate)
         num_segments = 2
 
+        # Only the analyzed segments are converted; the peak is taken over the whole chunk
+        peak = max(int(samples.max()), -int(samples.min()), 1)
+        audio_data = samples[:segment_size * num_segments].astype(np.float32)
+        audio_data /= peak  # Normalize
+
         for i in range(num_segments):
             start = i * segment_size
             end = start + segment_size
@@ -87,7 +103,7 @@ class ChefPuppetControl:
         position = int(self.mouth_closed_position + (self.mouth_open_position - self.mouth_closed_position) * openness)
         position = max(self.mouth_closed_position, min(self.mouth_open_position, position))
         try:
-            self.motors_bus.write("Goal_Position", position)
+            self.motors_bus.write("Goal_Position", position, self.motor_name)
             self.current_mouth_state = openness
         except Exception as e:
             print(f"Error setting mouth state: {e}")
@@ -123,7 +139,7 @@ class ChefPuppetControl:
             try:
                 print(f"Connecting to {servo_name}...")
                 temp_bus = FeetechMotorsBus(
-                    port=self.port,
+                    port=self._servo_port(servo_name),
                     motors={servo_name: (servo_index, servo_model)},
                 )
                 temp_bus.connect()
@@ -180,60 +196,37 @@ class ChefPuppetControl:
             return
 
         target_positions = all_positions[name]
-        current_positions = {}
-        temp_buses = {}
+        servo_names = [servo_name for servo_name in self.all_servos if servo_name in target_positions]
 
-        # Connect to all servos and get their current positions
-        for servo_name, (servo_index, servo_model) in self.all_servos.items():
-            if servo_name not in target_positions:
-                continue
-
-            try:
-                temp_bus = FeetechMotorsBus(
-                    port=self.port,
-                    motors={servo_name: (servo_index, servo_model)},
-                )
-                temp_bus.connect()
-                temp_bus.set_bus_baudrate(self.baudrate)
-                
-                current_position = temp_bus.read("Present_Position")
-                if isinstance(current_position, np.ndarray):
-                    current_position = int(current_position.item())
-                current_positions[servo_name] = current_position
-                temp_buses[servo_name] = temp_bus
-
-            except Exception as e:
-                print(f"Error connecting to {servo_name}: {str(e)}")
+        # Read all current positions in one sync read per port
+        try:
+            current_positions = self.motors_bus.read("Present_Position", servo_names)
+        except Exception as e:
+            print(f"Error reading current positions for state '{name}': {str(e)}")
+            return
 
-        # Calculate position changes
-        position_changes = {
-            servo: target_positions[servo] - current_positions[servo]
-            for servo in current_positions
-        }
+        target = np.array([target_positions[servo_name] for servo_name in servo_names])
+        position_changes = target - current_positions
 
-        # Perform smooth ramp movement
+        # Perform smooth ramp movement, writing every servo in one sync write per port each step
         steps = 100  # Number of steps for the ramp
         step_duration = movement_duration / steps
 
         for step in range(1, steps + 1):
-            for servo_name, change in position_changes.items():
-                new_position = int(current_positions[servo_name] + (change * step / steps))
-                try:
-                    temp_buses[servo_name].write("Goal_Position", new_position)
-                except Exception as e:
-                    print(f"Error setting position for {servo_name}: {str(e)}")
-            
-            time.sleep(step_duration)
+            new_positions = (current_positions + position_changes * step / steps).astype(int)
+            try:
+                self.motors_bus.write("Goal_Position", new_positions, servo_names)
+            except Exception as e:
+                print(f"Error setting positions for state '{name}': {str(e)}")
 
-        # Disconnect all temporary buses
-        for temp_bus in temp_buses.values():
-            temp_bus.disconnect()
+            time.sleep(step_duration)
 
         print(f"Finished setting positions for state '{name}' with smooth ramp")
 
     def cleanup(self):
-        puppet.load_and_set_state("default_position")
-        self.motors_bus.disconnect()
+        self.load_and_set_state("default_position")
+        if self.motors_bus.is_connected:
+            self.motors_bus.disconnect()
         print("ChefPuppetControl cleanup completed")
 
     def move_servo(self, motor_id, position=None, increment=None, movement_duration=0.4):
@@ -252,16 +245,7 @@ class ChefPuppetControl:
             return
 
         try:
-            temp_bus = FeetechMotorsBus(
-                port=self.port,
-                motors={servo_name: self.all_servos[servo_name]},
-            )
-            temp_bus.connect()
-            temp_bus.set_bus_baudrate(self.baudrate)
-            
-            current_position = temp_bus.read("Present_Position")
-            if isinstance(current_position, np.ndarray):
-                current_position = int(current_position.item())
+            current_position = int(self.motors_bus.read("Present_Position", servo_name)[0])
 
             if position is not None:
                 clamped_position = max(1000, min(3000, position))
@@ -269,7 +253,6 @@ class ChefPuppetControl:
                 clamped_position = max(1000, min(3000, current_position + increment))
             else:
                 print("No position or increment specified")
-                temp_bus.disconnect()
                 return
 
             print(f"Moving {servo_name} (Motor ID: {motor_id}) from {current_position} to position {clamped_position}")
@@ -281,12 +264,11 @@ class ChefPuppetControl:
 
             for step in range(1, steps + 1):
                 intermediate_position = int(current_position + (position_change * step / steps))
-                temp_bus.write("Goal_Position", intermediate_position)
+                self.motors_bus.write("Goal_Position", intermediate_position, servo_name)
                 time.sleep(step_duration)
 
             time.sleep(0.1)  # Short pause at the end of movement
             
-            temp_bus.disconnect()
             print(f"Finished moving {servo_name}")
         except Exception as e:
             print(f"Error moving {servo_name}: {str(e)}")
@@ -3,6 +3,7 @@ import logging
 import math
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 
 import numpy as np
@@ -864,3 +865,160 @@ class FeetechMotorsBus:
     def __del__(self):
         if getattr(self, "is_connected", False):
             self.disconnect()
+
+
+class FeetechMultiPortBus:
+    """
+    The FeetechMultiPortBus class spreads motors across several serial adapters and drives them as a single bus.
+    Each port is wrapped in its own `FeetechMotorsBus` and gets a dedicated I/O thread, so a sync read or write that
+    touches motors on several ports is issued on all of them at the same time. Adding a port adds bus bandwidth
+    instead of adding to the time spent per control tick.
+
+    Example of usage for 2 adapters:
+    ```python
+    motors_bus = FeetechMultiPortBus(
+        ports={
+            "/dev/ttyACM0": {"servo1": (1, "sts3215"), "servo2": (2, "sts3215")},
+            "/dev/ttyACM1": {"servo3": (3, "sts3215"), "servo4": (4, "sts3215")},
+        },
+    )
+    motors_bus.connect()
+
+    position = motors_bus.read("Present_Position")
+    motors_bus.write("Goal_Position", position + 30)
+
+    motors_bus.disconnect()
+    ```
+    """
+
+    def __init__(
+        self,
+        ports: dict[str, dict[str, tuple[int, str]]],
+        extra_model_control_table: dict[str, list[tuple]] | None = None,
+        extra_model_resolution: dict[str, int] | None = None,
+    ):
+        self.buses = {
+            port: FeetechMotorsBus(
+                port=port,
+                motors=motors,
+                extra_model_control_table=extra_model_control_table,
+                extra_model_resolution=extra_model_resolution,
+            )
+            for port, motors in ports.items()
+        }
+        self.motor_ports = {name: port for port, motors in ports.items() for name in motors}
+        if len(self.motor_ports) != sum(len(motors) for motors in ports.values()):
+            raise ValueError("A motor name can only be attached to one port.")
+
+        self.executors = {}
+        self.is_connected = False
+
+    @property
+    def ports(self) -> list[str]:
+        return list(self.buses.keys())
+
+    @property
+    def motors(self) -> dict[str, tuple[int, str]]:
+        return {name: motor for bus in self.buses.values() for name, motor in bus.motors.items()}
+
+    @property
+    def motor_names(self) -> list[str]:
+        return list(self.motor_ports.keys())
+
+    def connect(self):
+        if self.is_connected:
+            raise RobotDeviceAlreadyConnectedError(
+                f"FeetechMultiPortBus({self.ports}) is already connected. Do not call `motors_bus.connect()` twice."
+            )
+
+        for port, bus in self.buses.items():
+            bus.connect()
+            self.executors[port] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"feetech-{port}")
+
+        self.is_connected = True
+
+    def set_bus_baudrate(self, baudrate):
+        self._run_on_ports({port: (bus.set_bus_baudrate, (baudrate,)) for port, bus in self.buses.items()})
+
+    def _split_by_port(self, motor_names: str | list[str] | None) -> dict[str, list[str]]:
+        if motor_names is None:
+            motor_names = self.motor_names
+
+        if isinstance(motor_names, str):
+            motor_names = [motor_names]
+
+        shards = {}
+        for name in motor_names:
+            shards.setdefault(self.motor_ports[name], []).append(name)
+        return shards
+
+    def _run_on_ports(self, calls: dict):
+        """Run one `(fn, args)` call per port on that port's I/O thread and wait for all of them.
+
+        Going through the port thread even for a single port also serializes callers from different
+        threads (e.g. lip-sync and pose ramps), which would otherwise interleave packets on the wire.
+        """
+        if not self.is_connected:
+            raise RobotDeviceNotConnectedError(
+                f"FeetechMultiPortBus({self.ports}) is not connected. You need to run `motors_bus.connect()`."
+            )
+
+        futures = {port: self.executors[port].submit(fn, *args) for port, (fn, args) in calls.items()}
+        return {port: future.result() for port, future in futures.items()}
+
+    def read(self, data_name, motor_names: str | list[str] | None = None):
+        shards = self._split_by_port(motor_names)
+        results = self._run_on_ports(
+            {port: (self.buses[port].read, (data_name, names)) for port, names in shards.items()}
+        )
+
+        # Reassemble the values in the order the motors were requested
+        values_by_name = {}
+        for port, names in shards.items():
+            values_by_name.update(zip(names, results[port], strict=True))
+
+        if motor_names is None:
+            motor_names = self.motor_names
+        if isinstance(motor_names, str):
+            motor_names = [motor_names]
+
+        return np.array([values_by_name[name] for name in motor_names])
+
+    def write(self, data_name, values: int | float | np.ndarray, motor_names: str | list[str] | None = None):
+        if motor_names is None:
+            motor_names = self.motor_names
+
+        if isinstance(motor_names, str):
+            motor_names = [motor_names]
+
+        if isinstance(values, (int, float, np.integer)):
+            values = [int(values)] * len(motor_names)
+
+        values_by_name = dict(zip(motor_names, np.asarray(values).tolist(), strict=True))
+        shards = self._split_by_port(motor_names)
+        self._run_on_ports(
+            {
+                port: (self.buses[port].write, (data_name, [values_by_name[name] for name in names], names))
+                for port, names in shards.items()
+            }
+        )
+
+    def disconnect(self):
+        if not self.is_connected:
+            raise RobotDeviceNotConnectedError(
+                f"FeetechMultiPortBus({self.ports}) is not connected. Try running `motors_bus.connect()` first."
+            )
+
+        for executor in self.executors.values():
+            executor.shutdown(wait=True)
+        self.executors = {}
+
+        for bus in self.buses.values():
+            if bus.is_connected:
+                bus.disconnect()
+
+        self.is_connected = False
+
+    def __del__(self):
+        if getattr(self, "is_connected", False):
+            self.disconnect()
@@ -0,0 +1,98 @@
+import argparse
+import time
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+
+@dataclass
+class PreparedImage:
+    jpeg: bytes
+    width: int
+    height: int
+    cropped: bool
+    encode_ms: float
+
+    def summary(self) -> dict:
+        return {
+            "bytes": len(self.jpeg),
+            "size": f"{self.width}x{self.height}",
+            "cropped": self.cropped,
+            "encode_ms": self.encode_ms,
+        }
+
+
+class ImagePrep:
+    """Turns a camera frame into the smallest JPEG that still gets a good answer from the LLM.
+
+    Optionally crops to the region the person filter found (plus `crop_margin`), then
+    scales so the longest edge is at most `max_edge` and encodes at `quality`.
+    Upload size and model-side image processing both shrink with the pixel count.
+    """
+
+    def __init__(self, max_edge: int = 768, quality: int = 80, crop: bool = True, crop_margin: float = 0.25):
+        self.max_edge = max_edge
+        self.quality = quality
+        self.crop = crop
+        self.crop_margin = crop_margin
+
+    def prepare(self, image: np.ndarray, person=None) -> PreparedImage:
+        """Prepare a BGR image; `person` is an optional `PersonCheck` to crop to."""
+        start = time.perf_counter()
+        cropped = False
+        if self.crop and person is not None:
+            region = person.region(image.shape, self.crop_margin)
+            if region is not None:
+                x, y, w, h = region
+                image = image[y:y + h, x:x + w]
+                cropped = True
+
+        height, width = image.shape[:2]
+        scale = self.max_edge / max(width, height) if self.max_edge else 1.0
+        if scale < 1.0:
+            width, height = max(1, round(width * scale)), max(1, round(height * scale))
+            image = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+
+        ok, jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise ValueError("Could not encode image for the LLM")
+        return PreparedImage(jpeg.tobytes(), width, height, cropped, round((time.perf_counter() - start) * 1000, 1))
+
+
+def benchmark(image, edges, qualities, runs=10, llm=False):
+    """Print encode time and size for every setting, and optionally the end-to-end LLM latency."""
+    if llm:
+        from ImageDescription import gemini_chat
+
+    print(f"Source: {image.shape[1]}x{image.shape[0]}")
+    print(f"{'edge':>6} {'quality':>7} {'size':>10} {'bytes':>9} {'encode_ms':>10}" + (f" {'llm_ms':>8}" if llm else ""))
+    for edge in edges:
+        for quality in qualities:
+            prep = ImagePrep(max_edge=edge, quality=quality, crop=False)
+            times = []
+            for _ in range(runs):
+                prepared = prep.prepare(image)
+                times.append(prepared.encode_ms)
+            line = (f"{edge:>6} {quality:>7} {f'{prepared.width}x{prepared.height}':>10} "
+                    f"{len(prepared.jpeg):>9} {np.median(times):>10.1f}")
+            if llm:
+                start = time.perf_counter()
+                answer = gemini_chat(prepared.jpeg)
+                line += f" {(time.perf_counter() - start) * 1000:>8.0f}  {answer.strip().splitlines()[0][:60]}"
+            print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare LLM image settings by encode time, size and latency")
+    parser.add_argument("image", nargs="?", default="static/taken_image.jpg")
+    parser.add_argument("--edges", type=int, nargs="+", default=[384, 512, 768, 1024])
+    parser.add_argument("--qualities", type=int, nargs="+", default=[60, 75, 90])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--llm", action="store_true", help="Also send each version to Gemini and time the answer")
+    args = parser.parse_args()
+
+    source = cv2.imread(args.image)
+    if source is None:
+        raise SystemExit(f"Could not read {args.image}")
+    benchmark(source, args.edges, args.qualities, args.runs, args.llm)
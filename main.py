@@ -5,7 +5,6 @@ import struct
 import threading
 from contextlib import asynccontextmanager
 from threading import Lock, Thread
-from queue import Queue
 from io import BytesIO
 
 from fastapi import FastAPI, Request, HTTPException
@@ -15,23 +14,19 @@ from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 import uvicorn
 
-import pyaudio
-import pygame
 from PIL import Image
 import numpy as np
 import cv2
 from io import BytesIO
-import tempfile
-import wave
 from cartesia import AsyncCartesia
 # Add this import at the top of the file, with the other imports
-from camera_module import Camera, get_camera
+from camera_module import Camera, CameraGrabber, FrameBroadcast, get_camera
 import weave
 
 from dotenv import load_dotenv
 
 # Import the chat model functions
-from ImageDescription import gemini_chat
+from ImageDescription import gemini_chat, gemini_chat_sentences, get_gemini_client
 # from openai_client import openai_chat
 # from openrouter import openrouter_chat
 
@@ -54,6 +49,16 @@ import sys
 from concurrent.futures import ThreadPoolExecutor
 
 from cartesia_client import CartesiaStreamingClient
+from music_bank import MusicBank
+from utterance_archive import UtteranceArchiver
+from pipeline import StageTimer, prefetch
+from mic_capture import MicrophoneRing
+from mjpeg_stream import MjpegEncoder
+from motion_detection import MotionDetector
+from person_filter import PersonFilter
+from speculation import SpeculativePrefetcher
+from snapshot_store import SnapshotStore
+from image_prep import ImagePrep
 
 # Add this import at the top of the file
 from loguru import logger
@@ -61,7 +66,7 @@ from loguru import logger
 
 from datetime import datetime
 
-from fastapi.responses import FileResponse
+from fastapi.responses import Response
 
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
@@ -76,7 +81,14 @@ load_dotenv()
 # Global variables for camera and motion detection
 camera = None
 camera_lock = Lock()
-frame_queue = Queue(maxsize=10)  # Buffer for frames
+frame_broadcast = FrameBroadcast()  # Newest frame, shared by every viewer and the motion detector
+# Each frame is JPEG-encoded once for all /camera viewers
+mjpeg = MjpegEncoder(
+    frame_broadcast,
+    quality=int(os.getenv("CAMERA_JPEG_QUALITY", "80")),
+    max_fps=float(os.getenv("CAMERA_STREAM_FPS", "15")),
+    max_width=int(os.getenv("CAMERA_STREAM_WIDTH", "0")) or None,
+)
 motion_detected = False
 last_motion_time = 0
 audio_playing = False
@@ -87,13 +99,57 @@ CHAT_MODEL = "gemini"  # Options: "gemini", "openai", "openrouter"
 # Porcupine wake word detection
 porcupine = None
 recorder = None
+mic = None
 
 # Flag to enable/disable motion detection
 ENABLE_MOTION_DETECTION = False
+# Downscaled, strided detection is cheap enough to run on the Pi; benchmark with `python motion_detection.py`
+motion = MotionDetector(
+    width=int(os.getenv("MOTION_WIDTH", "160")),
+    stride=int(os.getenv("MOTION_STRIDE", "2")),
+    min_area=float(os.getenv("MOTION_MIN_AREA", "0.02")),
+    roi=json.loads(os.getenv("MOTION_ROI", "null")),
+)
 
 # Add these global variables
 CONVERSATION_MODE = "regular"  # Options: "regular", "live"
 
+# Said instead of asking the LLM when the person filter finds nobody in the snapshot
+NOBODY_IN_VIEW_LINE = "I can hear you, but I can't see you! Step in front of my camera, darling."
+
+# Fixed lines synthesized into the TTS cache at startup so they play instantly
+TTS_PREWARM_LINES = [
+    "Oooh, who do we have here?",
+    "Hello there! I'm Chef, your friendly kitchen assistant. How can I help you today?",
+    NOBODY_IN_VIEW_LINE,
+]
+
+# Local face/body check on snapshots and motion events, so empty scenes never reach the LLM
+person_filter = PersonFilter(width=int(os.getenv("PERSON_FILTER_WIDTH", "320"))) if os.getenv("PERSON_FILTER", "1") == "1" else None
+
+# Smaller image for the LLM (cropped to the person when found); LLM_MAX_EDGE=0 sends the full snapshot
+image_prep = ImagePrep(
+    max_edge=int(os.getenv("LLM_MAX_EDGE", "768")),
+    quality=int(os.getenv("LLM_JPEG_QUALITY", "80")),
+    crop=os.getenv("LLM_CROP", "1") == "1",
+) if os.getenv("LLM_MAX_EDGE", "768") != "0" else None
+
+# In motion mode, start the LLM request when somebody walks up so a wake word soon after finds it ready
+speculator = (
+    SpeculativePrefetcher(
+        # A callable, so the crop/resize/encode runs in the LLM worker thread rather than on the event loop
+        lambda frame, person: gemini_chat_sentences(
+            (lambda: image_prep.prepare(frame.bgr, person).jpeg) if image_prep else frame.to_pil
+        ),
+        max_age=float(os.getenv("SPECULATION_MAX_AGE", "20")),
+    )
+    if os.getenv("SPECULATIVE_PREFETCH", "1") == "1" and CHAT_MODEL == "gemini"
+    else None
+)
+
+# Latest snapshot, encoded once: served from memory, saved to disk in the background and sent to the LLM
+snapshots = SnapshotStore("static/taken_image.jpg").load()
+
 # Replace the import for SkeletonControl with ChefPuppetControl
 from chef_puppet_control import ChefPuppetControl
 
@@ -101,10 +157,23 @@ from chef_puppet_control import ChefPuppetControl
 
 # Replace all instances of 'skeleton' with 'puppet'
 puppet = None
+tts = None
+
+# Long-lived event loop (uvicorn's) that runs every interaction; detector threads submit work to it
+interaction_loop = None
+interaction_lock = Lock()
+current_interaction = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):   
-    global camera, porcupine, recorder, puppet
+    global camera, porcupine, recorder, mic, puppet, tts, interaction_loop
+    interaction_loop = asyncio.get_running_loop()
+
+    # Build the Gemini model once and open its connection while the rest of the hardware starts up
+    gemini_warmup = None
+    if CHAT_MODEL == "gemini" and os.getenv("GEMINI_WARMUP", "1") == "1":
+        gemini_warmup = asyncio.create_task(asyncio.to_thread(lambda: get_gemini_client().warm_up()))
+
     camera = get_camera()
     if not camera.start():
         raise RuntimeError("Could not start camera")
@@ -129,13 +198,29 @@ async def lifespan(app: FastAPI):
     recorder = PvRecorder(device_index=0, frame_length=porcupine.frame_length)
     recorder.start()
 
+    # One capture thread feeds every audio consumer (wake word, live audio, ...)
+    mic = MicrophoneRing(recorder, porcupine.frame_length).start()
+
     # Initialize puppet control once
     puppet = ChefPuppetControl()
     app.state.puppet = puppet
 
-    # Start frame capture in a separate thread
-    capture_thread = Thread(target=capture_frames, daemon=True)
-    capture_thread.start()
+    # Create the TTS service once so the output device and websocket stay warm between utterances
+    archiver = UtteranceArchiver().start()
+    tts = CartesiaStreamingClient(puppet=puppet, archiver=archiver)
+    try:
+        await tts.start()
+        await tts.prewarm(TTS_PREWARM_LINES)
+    except Exception as e:
+        logger.error(f"Could not warm up TTS websocket, will connect on first utterance: {e}")
+    app.state.tts = tts
+
+    # Decode the background music once so the wake word only has to pick a track
+    app.state.music_bank = MusicBank(rate=tts.engine.rate).load()
+
+    # One grabber thread owns the camera and publishes the freshest frame to everyone else
+    grabber = CameraGrabber(camera, frame_broadcast).start()
+    mjpeg.start(interaction_loop)
 
     # Start motion detection in a separate thread only if enabled
     if ENABLE_MOTION_DETECTION:
@@ -151,11 +236,21 @@ async def lifespan(app: FastAPI):
 
     # app.state.sse_manager = SSEManager()
 
+    if gemini_warmup is not None:
+        try:
+            await gemini_warmup
+        except Exception as e:
+            logger.error(f"Gemini warm-up failed, the first request will pay for connection setup: {e}")
+
     try:
         yield
     finally:
+        mjpeg.stop()
+        grabber.stop()
         if camera:
             camera.stop()
+        if mic:
+            mic.stop()
         if porcupine:
             porcupine.delete()
         if recorder:
@@ -163,6 +258,11 @@ async def lifespan(app: FastAPI):
             recorder.delete()
         if CONVERSATION_MODE == "live" and livekit_room:
             await livekit_room.disconnect()
+        if tts:
+            await tts.close()
+            if tts.archiver:
+                tts.archiver.stop()
+        snapshots.close()
         if puppet:
             puppet.cleanup()
 
@@ -203,87 +303,39 @@ async def sse_endpoint(request: Request):
 # from routes import router as webhook_router
 # app.include_router(webhook_router)
 
-def capture_frames():
-    global camera, frame_queue
-    while camera.isOpened():
-        frame = camera.capture_image()
-        if frame is not None:
-            if frame_queue.full():
-                frame_queue.get()  # Remove oldest frame if queue is full
-            frame_queue.put(frame)
-        time.sleep(0.01)  # Small delay to reduce CPU usage
-
-def gen_frames():
-    while True:
-        if not frame_queue.empty():
-            frame = frame_queue.get()
-            
-            # Check if frame is already bytes
-            if isinstance(frame, bytes):
-                jpeg_bytes = frame
-            # Check if frame is a PIL Image
-            elif isinstance(frame, Image.Image):
-                # Convert PIL Image to JPEG bytes
-                buffer = BytesIO()
-                frame.save(buffer, format="JPEG")
-                jpeg_bytes = buffer.getvalue()
-            # Check if frame is a numpy array (OpenCV format)
-            elif isinstance(frame, np.ndarray):
-                # Convert numpy array to PIL Image
-                pil_image = Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-                # Convert PIL Image to JPEG bytes
-                buffer = BytesIO()
-                pil_image.save(buffer, format="JPEG")
-                jpeg_bytes = buffer.getvalue()
-            else:
-                print(f"Unexpected frame type: {type(frame)}")
-                continue  # Skip this frame
-
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + jpeg_bytes + b'\r\n')
-        else:
-            time.sleep(0.01)
-
 @app.get("/camera")
-def video_feed():
-    return StreamingResponse(gen_frames(), media_type="multipart/x-mixed-replace; boundary=frame")
+async def video_feed():
+    # Every viewer shares the same encoded JPEG bytes; nothing is encoded per connection
+    return StreamingResponse(mjpeg.stream(), media_type="multipart/x-mixed-replace; boundary=frame")
+
+@app.get("/camera_stats")
+async def camera_stats():
+    return {"viewers": mjpeg.subscribers, "encoded_frames": mjpeg.encoded_frames, "published_frames": frame_broadcast.seq}
 
 def motion_detector():
     global motion_detected, last_motion_time, audio_playing
-    prev_frame = None
-    motion_threshold = 5000  # Adjust this value to change motion sensitivity
     cooldown = 5  # Cooldown period in seconds
 
+    seq = 0
     while True:
-        if not frame_queue.empty() and not audio_playing:
-            frame = frame_queue.get()
-            # Assuming frame is a PIL Image, convert it to numpy array for OpenCV operations
-            frame_np = np.array(frame)
-            gray = cv2.cvtColor(frame_np, cv2.COLOR_RGB2GRAY)
-            gray = cv2.GaussianBlur(gray, (21, 21), 0)
-
-            if prev_frame is None:
-                prev_frame = gray
-                continue
-
-            frame_diff = cv2.absdiff(prev_frame, gray)
-            thresh = cv2.threshold(frame_diff, 25, 255, cv2.THRESH_BINARY)[1]
-            thresh = cv2.dilate(thresh, None, iterations=2)
-            contours, _ = cv2.findContours(thresh.copy(), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-            for contour in contours:
-                if cv2.contourArea(contour) > motion_threshold:
-                    current_time = time.time()
-                    if current_time - last_motion_time > cooldown:
-                        motion_detected = True
-                        last_motion_time = current_time
-                        # frame is already a PIL Image, so no need to convert
-                        asyncio.run(process_motion(frame))
-                    break
-
-            prev_frame = gray
-        else:
-            time.sleep(0.01)
+        seq, frame = frame_broadcast.wait_next(seq, timeout=1.0)
+        if frame is not None and not audio_playing and motion.process(frame.bgr):
+            current_time = time.time()
+            if current_time - last_motion_time > cooldown:
+                # Copy out of the camera's buffer ring first: the person check can take longer than
+                # the ring lasts, and the speculation and greeting use this frame later on the loop
+                frame = frame.copy()
+                # Motion alone is often shadows or the door swinging; only greet actual people
+                person = person_filter.check(frame.bgr) if person_filter else None
+                if person is not None and not person.present:
+                    last_motion_time = current_time - cooldown + 1  # Look again in a second
+                    continue
+                motion_detected = True
+                last_motion_time = current_time
+                if speculator:
+                    interaction_loop.call_soon_threadsafe(speculator.start, frame, person)
+                # Only now pay for the RGB/PIL conversion
+                submit_interaction(process_motion, frame.to_pil())
 
 @app.get("/motion")
 def check_motion():
@@ -293,6 +345,34 @@ def check_motion():
         return {"motion": True}
     return {"motion": False}
 
+@app.get("/motion_stats")
+def motion_stats():
+    """Frames processed, motion frames and CPU cost per frame of the motion detector."""
+    stats = motion.stats()
+    if person_filter:
+        stats["person_filter"] = person_filter.stats()
+    return stats
+
+@app.get("/speculation_stats")
+def speculation_stats():
+    """Hit rate of speculative LLM requests started on motion, and why misses were discarded."""
+    return speculator.stats() if speculator else {}
+
+@app.get("/llm_stats")
+def llm_stats():
+    """Gemini client construction, warm-up (connection) and last request timings."""
+    return get_gemini_client().stats() if CHAT_MODEL == "gemini" else {}
+
+@app.get("/mic_stats")
+def mic_stats():
+    """Capture count plus per-consumer lag and overflow counters for the shared microphone ring."""
+    return mic.stats() if mic else {}
+
+@app.get("/tts_metrics")
+def tts_metrics():
+    """Timing breakdown for the most recent utterances, newest last."""
+    return [metrics.summary() for metrics in app.state.tts.metrics_history]
+
 @weave.op
 async def process_motion(pil_image):
     await stream_text_to_speech("Oooh, who do we have here?")
@@ -310,51 +390,72 @@ async def process_motion(pil_image):
 
 @weave.op
 async def stream_text_to_speech(text):
+    """Speak `text`, which is either a string or an async iterator of sentences."""
     global audio_playing
     puppet = app.state.puppet  # Use the existing puppet instance
-    client = CartesiaStreamingClient(puppet=puppet)
+    client = app.state.tts  # Long-lived TTS service created in lifespan
 
     try:
         audio_playing = True
         puppet.start_body_movement()
         puppet.eyes_on()
 
-        audio_data = await client.stream_tts(text)
+        if isinstance(text, str):
+            await client.stream_tts(text)
+        else:
+            # Sentences still being generated are spoken as they arrive
+            await client.stream_tts_incremental(text)
     except Exception as e:
         print(f"Error during text-to-speech: {e}")
     finally:
-        await client.close()
         audio_playing = False
         puppet.stop_body_movement()
         puppet.eyes_off()
-    
-    # Create a temporary file
-    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_wav:
-        # Write audio data to the temporary WAV file
-        with wave.open(temp_wav.name, 'wb') as wave_file:
-            wave_file.setnchannels(1)  # Mono
-            wave_file.setsampwidth(2)  # 16-bit
-            wave_file.setframerate(44100)  # Assuming 24kHz sample rate
-            wave_file.writeframes(audio_data)
-        
-        # Open the temporary WAV file for reading
-        wave_obj = wave.open(temp_wav.name, 'rb')
-    
-    return wave_obj
+
+    # The archiver writes the audio in the background; tracing only gets a reference and a preview
+    result = {"metrics": client.last_metrics.summary() if client.last_metrics else None}
+    record = client.last_record
+    if record is not None:
+        await asyncio.to_thread(record.done.wait, 1.0)
+        result.update(record.summary())
+    return result
+
+def submit_interaction(handler, *args):
+    """Schedule `handler(*args)` on the interaction loop unless an interaction is already running.
+
+    Returns the concurrent future, or None if the request was dropped because the puppet is busy.
+    """
+    global current_interaction
+    with interaction_lock:
+        if current_interaction is not None and not current_interaction.done():
+            return None
+        current_interaction = asyncio.run_coroutine_threadsafe(handler(*args), interaction_loop)
+    current_interaction.add_done_callback(_log_interaction_result)
+    return current_interaction
+
+def _log_interaction_result(future):
+    if future.cancelled():
+        logger.warning("Interaction was cancelled.")
+    elif future.exception() is not None:
+        logger.error(f"Error during interaction: {future.exception()}")
 
 def wake_word_detector():
-    global porcupine, recorder, puppet
+    global porcupine, mic, puppet
     logger.info("Wake word detector started")  # Add this line
+    frames = mic.subscribe("wake_word")
     try:
         while True:
-            pcm = recorder.read()
+            pcm = frames.read()
+            if pcm is None:
+                break
             result = porcupine.process(pcm)
             if result >= 0:
+                wake_time = time.time()
                 logger.info("Wake word detected!")
-                if CONVERSATION_MODE == "live":
-                    asyncio.run(handle_wake_word_live())
-                else:
-                    asyncio.run(handle_wake_word())
+                # Hand off to the interaction loop and keep reading so the recorder never overflows
+                handler = handle_wake_word_live if CONVERSATION_MODE == "live" else handle_wake_word
+                if submit_interaction(handler, wake_time) is None:
+                    logger.info("Still responding to the previous interaction, ignoring wake word.")
     except KeyboardInterrupt:
         logger.info("Wake word detection stopped.")
     except Exception as e:
@@ -363,7 +464,7 @@ def wake_word_detector():
         logger.info("Wake word detector finished")  # Add this line
 
 # Add a new function to handle wake word in live mode
-async def handle_wake_word_live():
+async def handle_wake_word_live(wake_time=None):
     global camera, livekit_room, livekit_agent
     logger.info("Wake word detected! Starting live conversation and taking a picture...")
     
@@ -377,7 +478,9 @@ async def handle_wake_word_live():
             return
 
     # Capture an image
-    pil_image = camera.capture_image()
+    frame = await capture_snapshot(wake_time)
+    # The Gemini thread needs a PIL image; convert off the event loop
+    pil_image = await asyncio.to_thread(frame.to_pil) if frame is not None else None
     
     if pil_image is not None:
         logger.info("Image captured successfully.")
@@ -399,11 +502,15 @@ async def handle_wake_word_live():
 
 # Add a new function to listen for audio input
 def listen_for_audio_input():
-    global recorder, livekit_agent
+    global mic, livekit_agent
+    frames = mic.subscribe("live_audio")
     try:
         while True:
-            audio_data = recorder.read()
-            asyncio.run(livekit_agent.on_audio(audio_data))
+            audio_data = frames.read()
+            if audio_data is None:
+                break
+            # Copy: the agent consumes it later on the interaction loop, after the ring may have moved on
+            asyncio.run_coroutine_threadsafe(livekit_agent.on_audio(audio_data.copy()), interaction_loop)
     except Exception as e:
         print(f"Error listening for audio input: {e}")
 
@@ -414,91 +521,153 @@ def process_image_with_gemini(pil_image):
     logger.info(f"Gemini image analysis: {response}")
     # You can add logic here to use the Gemini response if needed
 
+async def capture_snapshot(after=None, timeout=1.0):
+    """Return a copy of the first frame captured at or after `after` (default now).
+
+    The grabber is always running, so this is normally at most one frame interval away.
+    """
+    if after is None:
+        after = time.time()
+    frame = await asyncio.to_thread(frame_broadcast.wait_since, after, timeout)
+    if frame is None:
+        logger.error(f"No camera frame within {timeout}s of the request.")
+        return None
+    logger.info(f"Snapshot captured {(frame.timestamp - after) * 1000:.0f} ms after request")
+    # Copy out of the camera's buffer ring; the snapshot outlives the next few captures
+    return frame.copy()
+
 # Update the handle_wake_word function for regular mode
 @weave.op
-async def handle_wake_word():
-    global camera
-    # move the puppet body and light up eyes
-    puppet.load_and_set_state("standing_position")
-    # # logger.info("Wake word detected! Taking a picture...")
+async def handle_wake_word(wake_time=None):
+    """Respond to the wake word with stages running concurrently where they can.
 
-    audio_file = f"sounds/bgmusic{np.random.randint(1, 6)}.wav"
-    # # # Define function to play audio file
+    The pose ramp and music run alongside capture and the LLM request, and the head
+    gesture runs alongside TTS connection setup. Each stage is timed so the
+    end-to-end latency can be compared run to run.
+    """
+    global camera
+    timings = StageTimer()
+    tts = app.state.tts
+
+    # Music is mixed with speech on the TTS engine's output stream and ducked automatically while it talks
+    engine = tts.engine
+    music_track, music_samples = app.state.music_bank.random_track()
+    if music_samples is not None:
+        engine.play_music(music_samples, loop=True)
+        timings.mark("music_start")
+    else:
+        logger.error("No background music tracks loaded.")
 
-    def play_sound(file_path):
-        try:
-            pygame.mixer.init()
-            pygame.mixer.music.load(file_path)
-            pygame.mixer.music.play()
-            while pygame.mixer.music.get_busy():
-                pygame.time.Clock().tick(10)
-        except Exception as e:
-            logger.error(f"Error playing sound: {e}")
+    # Everything after the music starts is wrapped, so an error or cancellation never
+    # leaves the track looping with the puppet still standing
+    pose = None
+    completed = False
+    try:
+        # move the puppet body and light up eyes while the picture is taken
+        pose = timings.task("pose", asyncio.to_thread(puppet.load_and_set_state, "standing_position"))
 
-    # Play audio file in a separate thread
-    audio_thread = Thread(target=play_sound, args=(audio_file,), daemon=True)
-    audio_thread.start()
-    
-    max_retries = 3
-    retry_count = 0
-    while retry_count < max_retries:
-        try:
-            pil_image = camera.capture_image()
-            # if pil_image:
-            #     image_handler.save_image(pil_image)
-            break
-        except Exception as e:
-            retry_count += 1
-            logger.error(f"Error capturing image (attempt {retry_count}/{max_retries}): {e}")
-            if retry_count == max_retries:
-                logger.error("Max retries reached. Failed to capture image.")
-                pil_image = None
-            else:
-                time.sleep(1)  # Wait for 1 second before retrying
+        frame = await timings.run("capture", capture_snapshot(wake_time))
 
+        person = None
+        if frame is not None and person_filter:
+            person = await timings.run("person_check", asyncio.to_thread(person_filter.check, frame.bgr))
+            logger.info(f"Person check: {person.summary()}")
     
-    if pil_image is not None:
-        # Save the image
-        pil_image.save("static/taken_image.jpg")
+        if frame is not None:
+            # Encode once; /taken_image.jpg serves these bytes and the disk copy is written in the background
+            snapshot = timings.task("encode", asyncio.to_thread(snapshots.update, frame))
         
-        # Notify clients about the new image
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        # await notify_clients_new_image(timestamp)
-
-        logger.info("Image captured successfully. Processing with LLM...")
-        if CHAT_MODEL == "gemini":
-            response = gemini_chat(pil_image)
-        else:
-            response = "Oh fuck off you muppet"
+            # Notify clients about the new image
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            # await notify_clients_new_image(timestamp)
+
+            logger.info("Image captured successfully. Processing with LLM...")
+            if person is not None and not person.present:
+                # Nobody to roast; skip the LLM round trip and use the cached line
+                speech = NOBODY_IN_VIEW_LINE
+            elif CHAT_MODEL == "gemini":
+                speculation = speculator.take(frame) if speculator else None
+                if speculation is not None:
+                    # Started on motion; whatever has arrived already plays without waiting
+                    logger.info(f"Using speculative response started {speculation.age:.1f}s ago")
+                    timings.mark("speculation_hit")
+                    speech = speculation.replay()
+                else:
+                    if image_prep:
+                        prepared = await timings.run("prep", asyncio.to_thread(image_prep.prepare, frame.bgr, person))
+                        logger.info(f"LLM image: {prepared.summary()}")
+                        llm_image = prepared.jpeg
+                    else:
+                        # Without preprocessing the snapshot bytes go to the LLM as they are
+                        encoded = await snapshot
+                        llm_image = encoded.jpeg if encoded else await asyncio.to_thread(frame.to_pil)
+                    # Start the upload and generation now; sentences are buffered until TTS is ready for them
+                    speech = prefetch(gemini_chat_sentences(llm_image))
+            else:
+                speech = "Oh fuck off you muppet"
+
+            # The head gesture follows the pose (both drive servo 1) and overlaps with TTS connection setup
+            async def gesture():
+                await pose
+                await asyncio.to_thread(puppet.move_servo, 1, position=2220)
+
+            gesture_task = timings.task("gesture", gesture())
+            try:
+                await timings.run("tts_connect", tts.start())
+            except Exception as e:
+                logger.error(f"TTS connection setup failed, will retry when speaking: {e}")
+            await gesture_task
+
+            audio_data = await timings.run("speak", stream_text_to_speech(speech))
+            # The metrics always carry the spoken text; the archive record only exists with an archiver
+            response = tts.last_metrics.text if tts.last_metrics else None
         
-        logger.info(f"Received LLM response: {response}")
-        puppet.move_servo(1, position=2220)
-        audio_data = await stream_text_to_speech(response)
+            logger.info(f"Spoke LLM response: {response}")
+            await snapshot
         
-        # stop the puppet body movement and turn off the eyes
-        puppet.stop_body_movement()
-        puppet.eyes_off()
-    else:
-        logger.error("Failed to capture an image.")
-        await stream_text_to_speech("Hello there! I'm Chef, your friendly kitchen assistant. How can I help you today?")
-        puppet.stop_body_movement()
-        puppet.eyes_off()
-    # Fade out the playing pygame music
+            # stop the puppet body movement and turn off the eyes
+            puppet.stop_body_movement()
+            puppet.eyes_off()
+        else:
+            logger.error("Failed to capture an image.")
+            await pose
+            response = "Hello there! I'm Chef, your friendly kitchen assistant. How can I help you today?"
+            audio_data = await timings.run("speak", stream_text_to_speech(response))
+            puppet.stop_body_movement()
+            puppet.eyes_off()
+
+        if tts.last_metrics and tts.last_metrics.playback_start:
+            timings.mark("first_audio", tts.last_metrics.playback_start)
+        logger.info(f"Wake word stage timings: {timings.summary()}")
+
+        result = {
+            # Only the trace wants a PIL image; build it off the event loop once the response is done
+            "image": await asyncio.to_thread(frame.to_pil) if frame is not None else None,
+            "audio": audio_data, 
+            "bg_music": music_track,
+            "text response": response,
+            "person_check": person.summary() if person else None,
+            "timings": timings.summary(),
+        }
+
+        completed = True
+        return result
+    finally:
+        await _wind_down(engine, pose, fade=completed)
+
+async def _wind_down(engine, pose, fade):
+    """Stop the music (fading it out after a normal response) and put the puppet back at rest."""
     try:
-        pygame.mixer.music.fadeout(5000)  # Fade out over 2 seconds
-        pygame.time.wait(5000)  # Wait for the fadeout to complete
-        pygame.mixer.music.stop()  # Ensure the music is fully stopped
-        puppet.load_and_set_state("default_position")
-        pygame.mixer.quit()  # Clean up the mixer
+        if fade:
+            engine.fade_out_music(5000)  # Fade out over 5 seconds
+            await asyncio.sleep(5)  # Wait for the fadeout to complete
+        engine.stop_music()  # Ensure the music is fully stopped
+        if pose is not None:
+            # Let a pose ramp that is still running finish before moving back
+            await asyncio.gather(pose, return_exceptions=True)
+        await asyncio.to_thread(puppet.load_and_set_state, "default_position")
     except Exception as e:
-        logger.error(f"Error fading out music: {e}")
-
-    return {
-        "image": pil_image,
-        "audio": audio_data, 
-        "bg_music": wave.open(audio_file, 'rb'),
-        "text response": response
-    }
+        logger.error(f"Error winding down after the wake word: {e}")
 
 # async def notify_clients_new_image(timestamp):
 #     data = {
@@ -510,8 +679,15 @@ async def handle_wake_word():
 #     await app.state.sse_manager.broadcast(json.dumps(data))
 
 @app.get("/taken_image.jpg")
-async def get_image():
-    return FileResponse("static/taken_image.jpg")
+async def get_image(request: Request):
+    snapshot = snapshots.current
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="No snapshot taken yet")
+    # no-cache: browsers may keep it but must revalidate, which is a cheap 304 until the next wake word
+    headers = {"ETag": snapshot.etag, "Last-Modified": snapshot.last_modified, "Cache-Control": "no-cache"}
+    if snapshots.not_modified(snapshot, request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+        return Response(status_code=304, headers=headers)
+    return Response(snapshot.jpeg, media_type="image/jpeg", headers=headers)
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=False)
@@ -0,0 +1,128 @@
+import threading
+
+import numpy as np
+
+
+class MicrophoneRing:
+    """Single capture thread that writes PvRecorder frames into a preallocated ring.
+
+    Every frame gets a sequence number. Consumers (wake word, voice activity detection,
+    interaction recording, ...) each keep their own read position, so nobody steals
+    frames from anybody else, and frames are handed out as views into the ring rather
+    than copies.
+    """
+
+    def __init__(self, recorder, frame_length: int, slots: int = 256, margin: int = 4):
+        self.recorder = recorder
+        self.frame_length = frame_length
+        self.slots = slots
+        # Slots kept clear of the producer: it fills slot `seq` before publishing it, outside the lock
+        self.margin = margin
+        self.frames = np.zeros((slots, frame_length), dtype=np.int16)
+        self.seq = 0  # Sequence number of the next frame to be written
+        self.cond = threading.Condition()
+        self.consumers = {}
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="mic-capture", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def _run(self):
+        while self.running:
+            try:
+                pcm = self.recorder.read()
+            except Exception as e:
+                print(f"Error reading microphone: {e}")
+                break
+            self.frames[self.seq % self.slots] = pcm
+            with self.cond:
+                self.seq += 1
+                self.cond.notify_all()
+
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+
+    def subscribe(self, name: str) -> "MicConsumer":
+        """Register a consumer that starts reading from the next captured frame."""
+        consumer = MicConsumer(self, name)
+        self.consumers[name] = consumer
+        return consumer
+
+    def stats(self) -> dict:
+        return {
+            "captured_frames": self.seq,
+            "consumers": {name: consumer.stats() for name, consumer in self.consumers.items()},
+        }
+
+
+class MicConsumer:
+    """Independent reader of a `MicrophoneRing`.
+
+    If the reader falls close to a ring's worth behind (within `ring.margin` slots of the
+    one being written), the frames it missed are counted as overflow and it resumes half
+    a ring behind the producer.
+    """
+
+    def __init__(self, ring: MicrophoneRing, name: str):
+        self.ring = ring
+        self.name = name
+        self.next_seq = ring.seq
+        self.frames_read = 0
+        self.overflow_frames = 0
+        self.lag_max = 0
+
+    def read(self, timeout: float | None = None) -> np.ndarray | None:
+        """Return the next frame as a read-only view, or None on timeout or after the ring stops.
+
+        The view stays valid until the producer laps it, so copy it if it must outlive
+        the next `ring.slots` frames.
+        """
+        ring = self.ring
+        with ring.cond:
+            if not ring.cond.wait_for(lambda: ring.seq > self.next_seq or not ring.running, timeout):
+                return None
+            latest = ring.seq
+
+        if latest <= self.next_seq:
+            return None
+
+        behind = latest - self.next_seq
+        if behind > ring.slots - 1 - ring.margin:
+            resume = latest - ring.slots // 2
+            self.overflow_frames += resume - self.next_seq
+            self.next_seq = resume
+            behind = latest - self.next_seq
+
+        self.lag_max = max(self.lag_max, behind - 1)
+        frame = ring.frames[self.next_seq % ring.slots]
+        frame = frame.view()
+        frame.flags.writeable = False
+        self.next_seq += 1
+        self.frames_read += 1
+        return frame
+
+    @property
+    def lag(self) -> int:
+        """Frames captured but not yet read by this consumer."""
+        return self.ring.seq - self.next_seq
+
+    def stats(self) -> dict:
+        return {
+            "frames_read": self.frames_read,
+            "lag": self.lag,
+            "lag_max": self.lag_max,
+            "overflow_frames": self.overflow_frames,
+        }
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from camera_module import Frame
+
+BOUNDARY = b"frame"
+
+
+class MjpegEncoder:
+    """Encodes each captured frame to JPEG once and shares the bytes with every viewer.
+
+    A dedicated thread waits on the `FrameBroadcast`, encodes the newest frame (at most
+    `max_fps` times per second, scaled down to `max_width` if set) and hands the bytes
+    to the event loop. Viewers are async generators that wait on an `asyncio.Event`, so
+    an extra viewer costs only its socket writes, not an encode or a worker thread.
+    Nothing is encoded while nobody is watching.
+    """
+
+    def __init__(self, frames, quality: int = 80, max_fps: float = 15, max_width: int | None = None):
+        self.frames = frames
+        self.quality = quality
+        self.max_fps = max_fps
+        self.max_width = max_width
+
+        self.jpeg = None
+        self.seq = 0
+        self.subscribers = 0
+        self.encoded_frames = 0
+        self.loop = None
+        self._event = None
+        self._running = False
+        self._thread = None
+
+    def start(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self._event = asyncio.Event()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="mjpeg-encoder", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def encode(self, frame) -> bytes | None:
+        if isinstance(frame, Frame):
+            frame = frame.bgr
+        elif isinstance(frame, Image.Image):
+            frame = cv2.cvtColor(np.asarray(frame), cv2.COLOR_RGB2BGR)
+        elif not isinstance(frame, np.ndarray):
+            print(f"Unexpected frame type: {type(frame)}")
+            return None
+
+        if self.max_width and frame.shape[1] > self.max_width:
+            height = int(frame.shape[0] * self.max_width / frame.shape[1])
+            frame = cv2.resize(frame, (self.max_width, height), interpolation=cv2.INTER_AREA)
+
+        ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        return jpeg.tobytes() if ok else None
+
+    def _run(self):
+        seq = 0
+        min_interval = 1.0 / self.max_fps if self.max_fps else 0.0
+        last_encode = 0.0
+        while self._running:
+            seq, frame = self.frames.wait_next(seq, timeout=1.0)
+            if frame is None or self.subscribers == 0:
+                continue
+
+            # Skip frames that arrive faster than the configured rate
+            now = time.monotonic()
+            if now - last_encode < min_interval:
+                continue
+            last_encode = now
+
+            jpeg = self.encode(frame)
+            if jpeg is not None:
+                self.encoded_frames += 1
+                self.loop.call_soon_threadsafe(self._publish, jpeg)
+
+    def _publish(self, jpeg: bytes):
+        self.jpeg = jpeg
+        self.seq += 1
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    async def stream(self):
+        """Multipart MJPEG body for one viewer."""
+        self.subscribers += 1
+        try:
+            seq = 0
+            while True:
+                if self.seq == seq:
+                    await self._event.wait()
+                seq = self.seq
+                yield (b'--' + BOUNDARY + b'\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + self.jpeg + b'\r\n')
+        finally:
+            self.subscribers -= 1
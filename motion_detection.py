@@ -0,0 +1,179 @@
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionDetector:
+    """Cheap motion detection against a running-average background.
+
+    Every `stride`-th frame is shrunk to `width` pixels wide, converted to gray and
+    lightly blurred. It is compared with a background model that slowly follows the
+    scene (`alpha` per processed frame). Motion is reported when the fraction of changed
+    pixels inside the ROI mask exceeds `min_area`. All working buffers are allocated
+    once, on the first frame, so a processed frame allocates nothing.
+
+    `roi` is a list of `(x, y, w, h)` rectangles in 0-1 frame coordinates; only pixels
+    inside them count. None means the whole frame.
+    """
+
+    def __init__(
+        self,
+        width: int = 160,
+        stride: int = 2,
+        alpha: float = 0.05,
+        threshold: int = 25,
+        min_area: float = 0.02,
+        blur: int = 5,
+        roi: list | None = None,
+    ):
+        self.width = width
+        self.stride = max(1, stride)
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_area = min_area
+        self.blur = blur
+        self.roi = roi
+
+        self.frames_seen = 0
+        self.frames_processed = 0
+        self.motion_events = 0
+        self.cpu_s = 0.0
+        self.last_score = 0.0
+        self._shape = None
+
+    def _allocate(self, frame: np.ndarray):
+        height = max(1, round(frame.shape[0] * self.width / frame.shape[1]))
+        self._size = (self.width, height)
+        self._small = np.empty((height, self.width, 3), dtype=np.uint8)
+        self._gray = np.empty((height, self.width), dtype=np.uint8)
+        self._background = None
+        self._reference = np.empty((height, self.width), dtype=np.uint8)
+        self._diff = np.empty((height, self.width), dtype=np.uint8)
+        self._mask = None
+        if self.roi:
+            self._mask = np.zeros((height, self.width), dtype=np.uint8)
+            for x, y, w, h in self.roi:
+                x0, y0 = int(x * self.width), int(y * height)
+                x1, y1 = int((x + w) * self.width), int((y + h) * height)
+                self._mask[y0:y1, x0:x1] = 255
+        self._area = cv2.countNonZero(self._mask) if self._mask is not None else height * self.width
+        self._shape = frame.shape
+
+    def reset(self):
+        """Forget the background, e.g. after the camera moved."""
+        self._background = None
+
+    def process(self, frame: np.ndarray) -> bool:
+        """Feed one BGR frame. Returns True if it shows motion (skipped frames return False)."""
+        self.frames_seen += 1
+        if (self.frames_seen - 1) % self.stride:
+            return False
+
+        cpu_start = time.process_time()
+        if frame.shape != self._shape:
+            self._allocate(frame)
+
+        cv2.resize(frame, self._size, dst=self._small, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        if self.blur > 1:
+            cv2.blur(self._gray, (self.blur, self.blur), dst=self._gray)
+
+        if self._background is None:
+            self._background = self._gray.astype(np.float32)
+            self.frames_processed += 1
+            self.cpu_s += time.process_time() - cpu_start
+            return False
+
+        cv2.convertScaleAbs(self._background, dst=self._reference)
+        cv2.absdiff(self._gray, self._reference, dst=self._diff)
+        cv2.threshold(self._diff, self.threshold, 255, cv2.THRESH_BINARY, dst=self._diff)
+        if self._mask is not None:
+            cv2.bitwise_and(self._diff, self._mask, dst=self._diff)
+        self.last_score = cv2.countNonZero(self._diff) / self._area if self._area else 0.0
+        cv2.accumulateWeighted(self._gray, self._background, self.alpha)
+
+        motion = self.last_score > self.min_area
+        if motion:
+            self.motion_events += 1
+        self.frames_processed += 1
+        self.cpu_s += time.process_time() - cpu_start
+        return motion
+
+    def stats(self) -> dict:
+        return {
+            "frames_seen": self.frames_seen,
+            "frames_processed": self.frames_processed,
+            "motion_frames": self.motion_events,
+            "last_score": round(self.last_score, 4),
+            "cpu_ms_per_processed_frame": round(self.cpu_s * 1000 / self.frames_processed, 3) if self.frames_processed else None,
+            "cpu_ms_per_frame": round(self.cpu_s * 1000 / self.frames_seen, 3) if self.frames_seen else None,
+        }
+
+
+def legacy_motion(prev_gray, frame, threshold=5000):
+    """The previous full-resolution pipeline, kept only as a benchmark baseline."""
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    gray = cv2.GaussianBlur(gray, (21, 21), 0)
+    if prev_gray is None:
+        return gray, False
+    thresh = cv2.threshold(cv2.absdiff(prev_gray, gray), 25, 255, cv2.THRESH_BINARY)[1]
+    thresh = cv2.dilate(thresh, None, iterations=2)
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return gray, any(cv2.contourArea(c) > threshold for c in contours)
+
+
+def synthetic_frames(count, width=1280, height=720):
+    """Noisy static scene with a box walking across it."""
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    for i in range(count):
+        frame = base.copy()
+        x = (i * 15) % width
+        frame[height // 3: height // 3 + 200, x: x + 120] = 255
+        yield frame
+
+
+def camera_frames(count, index=0):
+    capture = cv2.VideoCapture(index)
+    try:
+        for _ in range(count):
+            ok, frame = capture.read()
+            if not ok:
+                break
+            yield frame
+    finally:
+        capture.release()
+
+
+def benchmark(frames, detector):
+    frames = list(frames)
+    legacy_cpu = time.process_time()
+    prev = None
+    for frame in frames:
+        prev, _ = legacy_motion(prev, frame)
+    legacy_cpu = time.process_time() - legacy_cpu
+
+    for frame in frames:
+        detector.process(frame)
+
+    stats = detector.stats()
+    print(f"Frames: {len(frames)} at {frames[0].shape[1]}x{frames[0].shape[0]}")
+    print(f"Legacy full-res pipeline: {legacy_cpu * 1000 / len(frames):.2f} ms CPU per frame")
+    print(f"MotionDetector(width={detector.width}, stride={detector.stride}): "
+          f"{stats['cpu_ms_per_frame']:.2f} ms CPU per frame "
+          f"({stats['cpu_ms_per_processed_frame']:.2f} ms per processed frame)")
+    print(f"Motion reported on {stats['motion_frames']} of {stats['frames_processed']} processed frames")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure motion detection CPU cost per frame")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--camera", action="store_true", help="Use live camera frames instead of synthetic ones")
+    parser.add_argument("--width", type=int, default=160)
+    parser.add_argument("--stride", type=int, default=2)
+    args = parser.parse_args()
+
+    source = camera_frames(args.frames) if args.camera else synthetic_frames(args.frames)
+    benchmark(source, MotionDetector(width=args.width, stride=args.stride))
@@ -0,0 +1,60 @@
+import glob
+import mmap
+import os
+import random
+
+import numpy as np
+
+from audio_output import load_wav
+
+
+class MusicBank:
+    """Background music tracks decoded once into memory-mapped PCM at the output rate.
+
+    Each `sounds/bgmusic*.wav` is decoded to mono int16 at `rate` and written next to
+    the other tracks in `cache_dir` as a raw `.pcm` file. Later startups reuse the raw
+    file as long as it is newer than its source, so the hot path never touches a
+    decoder: picking a track just hands the engine a memory map it can start reading
+    at any sample.
+    """
+
+    def __init__(self, pattern: str = "sounds/bgmusic*.wav", rate: int = 44100, cache_dir: str = "music_cache"):
+        self.pattern = pattern
+        self.rate = rate
+        self.cache_dir = cache_dir
+        self.tracks = {}
+
+    def load(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for path in sorted(glob.glob(self.pattern)):
+            name = os.path.splitext(os.path.basename(path))[0]
+            try:
+                self.tracks[name] = self._load_track(path, name)
+            except Exception as e:
+                print(f"Error loading music track {path}: {e}")
+        print(f"Loaded {len(self.tracks)} music tracks into the music bank")
+        return self
+
+    def _load_track(self, path: str, name: str) -> np.ndarray:
+        pcm_path = os.path.join(self.cache_dir, f"{name}-{self.rate}.pcm")
+        if not os.path.exists(pcm_path) or os.path.getmtime(pcm_path) < os.path.getmtime(path):
+            samples = load_wav(path, self.rate)
+            tmp_path = f"{pcm_path}.tmp"
+            samples.tofile(tmp_path)
+            os.replace(tmp_path, pcm_path)
+
+        samples = np.memmap(pcm_path, dtype=np.int16, mode="r")
+        # Ask the kernel to page the track in now rather than on the first callback that reads it
+        if hasattr(samples, "_mmap") and hasattr(mmap, "MADV_WILLNEED"):
+            samples._mmap.madvise(mmap.MADV_WILLNEED)
+        return samples
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def random_track(self):
+        """Return a random `(name, samples)` pair, or `(None, None)` if the bank is empty."""
+        if not self.tracks:
+            return None, None
+        name = random.choice(list(self.tracks))
+        return name, self.tracks[name]
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+
+class StageTimer:
+    """Records when each stage of an interaction started and how long it took.
+
+    Times are milliseconds relative to the moment the timer was created (the wake word),
+    so overlapping stages can be read straight off the summary.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.stages = {}
+
+    def _ms(self, t: float) -> float:
+        return round((t - self.t0) * 1000, 1)
+
+    async def run(self, name: str, awaitable):
+        """Await `awaitable` and record it as stage `name`."""
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.stages[name] = {"start_ms": self._ms(start), "duration_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    def task(self, name: str, awaitable) -> asyncio.Task:
+        """Run `awaitable` as a background task, timed as stage `name`."""
+        return asyncio.create_task(self.run(name, awaitable))
+
+    def mark(self, name: str, at: float | None = None):
+        """Record a point in time (a `perf_counter()` value, default now) as `name`."""
+        if at is None:
+            at = time.perf_counter()
+        self.stages[name] = {"start_ms": self._ms(at), "duration_ms": 0.0}
+
+    def summary(self) -> dict:
+        stages = dict(sorted(self.stages.items(), key=lambda item: item[1]["start_ms"]))
+        stages["total_ms"] = self._ms(time.perf_counter())
+        return stages
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def prefetch(source):
+    """Start consuming the async iterator `source` now and buffer its items for a later reader.
+
+    Useful to kick off a slow producer (e.g. an LLM stream) before its consumer is ready.
+    Errors from `source` are re-raised to the reader.
+    """
+    queue = asyncio.Queue()
+    finished = object()
+
+    async def pump():
+        try:
+            async for item in source:
+                await queue.put(item)
+            await queue.put(finished)
+        except Exception as e:
+            await queue.put(_Failure(e))
+
+    task = asyncio.create_task(pump())
+
+    async def drain():
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            if not task.done():
+                task.cancel()
+
+    return drain()
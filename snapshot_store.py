@@ -0,0 +1,87 @@
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+
+import cv2
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    jpeg: bytes
+    etag: str
+    modified: float  # time.time() when it was taken
+
+    @property
+    def last_modified(self) -> str:
+        return formatdate(self.modified, usegmt=True)
+
+
+class SnapshotStore:
+    """Keeps the latest snapshot as encoded JPEG bytes in memory and persists it off the hot path.
+
+    The same bytes are served by `/taken_image.jpg` (with ETag/Last-Modified so clients
+    can poll with conditional GETs), written to `path` by a background thread (temp file
+    plus atomic rename, so readers never see a half-written image), and uploaded to the LLM.
+    """
+
+    def __init__(self, path: str = "static/taken_image.jpg", quality: int = 90):
+        self.path = path
+        self.quality = quality
+        self.current = None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-writer")
+
+    def load(self):
+        """Serve the last persisted snapshot until a new one is taken."""
+        try:
+            with open(self.path, "rb") as f:
+                jpeg = f.read()
+            self.current = Snapshot(jpeg, self._etag(jpeg), os.path.getmtime(self.path))
+        except FileNotFoundError:
+            pass
+        return self
+
+    @staticmethod
+    def _etag(jpeg: bytes) -> str:
+        return '"' + hashlib.sha1(jpeg).hexdigest()[:20] + '"'
+
+    def update(self, frame) -> Snapshot | None:
+        """Encode a `Frame` once, make it the current snapshot and queue it for disk."""
+        ok, jpeg = cv2.imencode(".jpg", frame.bgr, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            print("Error: Could not encode snapshot")
+            return None
+        jpeg = jpeg.tobytes()
+        snapshot = Snapshot(jpeg, self._etag(jpeg), frame.timestamp or time.time())
+        self.current = snapshot
+        self.executor.submit(self._persist, snapshot)
+        return snapshot
+
+    def _persist(self, snapshot: Snapshot):
+        # Skip stale writes if a newer snapshot was taken while this one waited
+        if snapshot is not self.current:
+            return
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(snapshot.jpeg)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error saving snapshot to {self.path}: {e}")
+
+    def not_modified(self, snapshot: Snapshot, if_none_match: str | None, if_modified_since: str | None) -> bool:
+        """HTTP conditional GET check; If-None-Match wins over If-Modified-Since as per RFC 9110."""
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return "*" in tags or snapshot.etag in tags
+        if if_modified_since is not None:
+            try:
+                return int(snapshot.modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def close(self):
+        self.executor.shutdown(wait=True)
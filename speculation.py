@@ -0,0 +1,128 @@
+import asyncio
+import time
+
+import cv2
+import numpy as np
+
+
+class Speculation:
+    """An LLM response started ahead of time for one frame, buffered until somebody wants it."""
+
+    def __init__(self, frame, thumbnail: np.ndarray, source):
+        self.frame = frame
+        self.thumbnail = thumbnail
+        self.started = time.monotonic()
+        self.sentences = []
+        self.done = False
+        self.error = None
+        self.cond = asyncio.Condition()
+        self.task = asyncio.create_task(self._collect(source))
+
+    async def _collect(self, source):
+        try:
+            async for sentence in source:
+                async with self.cond:
+                    self.sentences.append(sentence)
+                    self.cond.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            async with self.cond:
+                self.done = True
+                self.cond.notify_all()
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def failed(self) -> bool:
+        return self.done and self.error is not None
+
+    async def replay(self):
+        """Yield the buffered sentences, then the rest as they arrive. Errors are re-raised."""
+        i = 0
+        while True:
+            async with self.cond:
+                await self.cond.wait_for(lambda: i < len(self.sentences) or self.done)
+                if i >= len(self.sentences):
+                    if self.error is not None:
+                        raise self.error
+                    return
+                sentence = self.sentences[i]
+            i += 1
+            yield sentence
+
+    def cancel(self):
+        """Stop collecting; the source's cleanup also stops the LLM stream behind it."""
+        self.task.cancel()
+
+
+class SpeculativePrefetcher:
+    """Starts the LLM request on motion so a wake word shortly after finds the answer ready.
+
+    `generate(frame, person)` must return an async iterator of sentences. Only the newest
+    speculation is kept. `take()` hands it over when it is younger than `max_age` seconds
+    and the scene still looks the same. That means the mean absolute difference between
+    tiny grayscale thumbnails is below `scene_threshold`, on a 0-255 scale. Otherwise it
+    is discarded. Everything runs on the event loop, so no locking is needed.
+    """
+
+    def __init__(self, generate, max_age: float = 20.0, scene_threshold: float = 12.0, thumb_size=(32, 24)):
+        self.generate = generate
+        self.max_age = max_age
+        self.scene_threshold = scene_threshold
+        self.thumb_size = thumb_size
+        self.current = None
+        self.counts = {"started": 0, "hits": 0, "misses": 0, "expired": 0, "scene_changed": 0, "failed": 0, "superseded": 0}
+        self.hit_ages = []
+
+    def thumbnail(self, frame) -> np.ndarray:
+        small = cv2.resize(frame.bgr, self.thumb_size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def start(self, frame, person=None):
+        """Begin a speculative request for `frame` (a `Frame` the caller no longer modifies).
+
+        `person` is the `PersonCheck` for the frame, if any, so the request can be cropped.
+        """
+        if self.current is not None:
+            self.counts["superseded"] += 1
+            self.current.cancel()
+        self.current = Speculation(frame, self.thumbnail(frame), self.generate(frame, person))
+        self.counts["started"] += 1
+
+    def take(self, frame):
+        """Return the pending speculation if it still applies to `frame`, else None."""
+        speculation, self.current = self.current, None
+        if speculation is None:
+            self.counts["misses"] += 1
+            return None
+
+        reason = None
+        if speculation.age > self.max_age:
+            reason = "expired"
+        elif speculation.failed:
+            reason = "failed"
+        else:
+            change = float(np.mean(cv2.absdiff(speculation.thumbnail, self.thumbnail(frame))))
+            if change > self.scene_threshold:
+                reason = "scene_changed"
+
+        if reason is not None:
+            self.counts[reason] += 1
+            speculation.cancel()
+            return None
+
+        self.counts["hits"] += 1
+        self.hit_ages.append(speculation.age)
+        return speculation
+
+    def stats(self) -> dict:
+        lookups = sum(self.counts[k] for k in ("hits", "misses", "expired", "scene_changed", "failed"))
+        return {
+            **self.counts,
+            "hit_rate": round(self.counts["hits"] / lookups, 3) if lookups else None,
+            "mean_hit_age_s": round(sum(self.hit_ages) / len(self.hit_ages), 2) if self.hit_ages else None,
+            "pending_age_s": round(self.current.age, 2) if self.current else None,
+        }
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pyaudio")  # audio_output imports it at module level
+
+from audio_output import PcmRingBuffer, StreamingResampler
+
+
+def random_chunks(samples, rng, max_chunks=40):
+    cuts = np.sort(rng.choice(np.arange(1, len(samples)), rng.integers(1, max_chunks), replace=False))
+    return np.split(samples, cuts)
+
+
+@pytest.mark.parametrize("in_rate,out_rate", [
+    (22050, 44100),
+    (24000, 44100),
+    (16000, 44100),
+    (44100, 48000),
+    (44100, 22050),
+])
+def test_resampler_chunking_matches_single_call(in_rate, out_rate):
+    rng = np.random.default_rng(in_rate + out_rate)
+    samples = rng.integers(-32768, 32767, 5000).astype(np.int16)
+    whole = StreamingResampler(in_rate, out_rate).process(samples)
+
+    for _ in range(20):
+        resampler = StreamingResampler(in_rate, out_rate)
+        chunked = np.concatenate([resampler.process(chunk) for chunk in random_chunks(samples, rng)])
+        np.testing.assert_array_equal(chunked, whole)
+
+
+def test_resampler_single_sample_chunks():
+    rng = np.random.default_rng(0)
+    samples = rng.integers(-32768, 32767, 300).astype(np.int16)
+    whole = StreamingResampler(24000, 44100).process(samples)
+
+    resampler = StreamingResampler(24000, 44100)
+    chunked = np.concatenate([resampler.process(samples[i:i + 1]) for i in range(len(samples))])
+    np.testing.assert_array_equal(chunked, whole)
+
+
+def test_resampler_follows_linear_interpolation():
+    samples = np.arange(0, 1000, 10, dtype=np.int16)
+    out = StreamingResampler(22050, 44100).process(samples)
+    # Upsampling a ramp by 2 puts a midpoint between every pair of samples
+    np.testing.assert_array_equal(out, np.arange(0, 991, 5, dtype=np.int16))
+
+
+def test_resampler_passthrough_and_reset():
+    samples = np.arange(10, dtype=np.int16)
+    assert StreamingResampler(44100, 44100).process(samples) is samples
+
+    resampler = StreamingResampler(24000, 44100)
+    first = resampler.process(samples)
+    resampler.reset()
+    np.testing.assert_array_equal(resampler.process(samples), first)
+
+
+def test_ring_wraps_around_at_capacity():
+    ring = PcmRingBuffer(8)
+    out = np.zeros(8, dtype=np.int16)
+
+    assert ring.write(np.arange(1, 6, dtype=np.int16)) == 5
+    assert ring.read_into(out[:3]) == 3
+    np.testing.assert_array_equal(out[:3], [1, 2, 3])
+
+    # 6 more samples: 3 fit before the end of the buffer, 3 wrap to the start
+    assert ring.write(np.arange(6, 12, dtype=np.int16)) == 6
+    assert ring.fill == 8 and ring.free == 0
+    assert ring.read_into(out) == 8
+    np.testing.assert_array_equal(out, np.arange(4, 12))
+    assert ring.fill == 0
+
+
+def test_ring_write_stops_when_full():
+    ring = PcmRingBuffer(4)
+    assert ring.write(np.arange(6, dtype=np.int16)) == 4
+    assert ring.write(np.arange(2, dtype=np.int16)) == 0
+
+    out = np.zeros(6, dtype=np.int16)
+    assert ring.read_into(out) == 4
+    np.testing.assert_array_equal(out[:4], [0, 1, 2, 3])
+    assert ring.read_into(out) == 0
+
+
+def test_ring_long_stream_through_small_buffer():
+    rng = np.random.default_rng(0)
+    ring = PcmRingBuffer(7)
+    stream = rng.integers(-32768, 32767, 500).astype(np.int16)
+    received = []
+    out = np.zeros(5, dtype=np.int16)
+
+    pos = 0
+    while pos < len(stream) or ring.fill:
+        pos += ring.write(stream[pos:pos + rng.integers(1, 6)])
+        n = ring.read_into(out[:rng.integers(1, 6)])
+        received.extend(out[:n])
+    np.testing.assert_array_equal(received, stream)
+    assert ring.write_pos == ring.read_pos == len(stream)
+
+
+def test_ring_clear_drops_pending_samples():
+    ring = PcmRingBuffer(8)
+    ring.write(np.arange(5, dtype=np.int16))
+    ring.clear()
+    assert ring.fill == 0
+    assert ring.read_into(np.zeros(4, dtype=np.int16)) == 0
@@ -0,0 +1,120 @@
+import queue
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from mic_capture import MicrophoneRing
+
+FRAME_LENGTH = 4
+
+
+class FakeRecorder:
+    """PvRecorder stand-in that hands out frames filled with their sequence number, on demand."""
+
+    def __init__(self):
+        self.frames = queue.Queue()
+        self.count = 0
+        self.closed = False
+
+    def produce(self, n):
+        for _ in range(n):
+            self.frames.put(np.full(FRAME_LENGTH, self.count, dtype=np.int16))
+            self.count += 1
+
+    def read(self):
+        while True:
+            try:
+                return self.frames.get(timeout=0.01)
+            except queue.Empty:
+                if self.closed:
+                    raise RuntimeError("recorder closed")
+
+
+def wait_for_seq(ring, seq, timeout=2.0):
+    with ring.cond:
+        assert ring.cond.wait_for(lambda: ring.seq >= seq, timeout)
+
+
+@pytest.fixture
+def ring():
+    recorder = FakeRecorder()
+    ring = MicrophoneRing(recorder, FRAME_LENGTH, slots=8, margin=2).start()
+    yield ring
+    recorder.closed = True
+    ring.stop()
+
+
+def test_consumer_reads_frames_in_order(ring):
+    consumer = ring.subscribe("test")
+    ring.recorder.produce(3)
+    for expected in range(3):
+        frame = consumer.read(timeout=1)
+        assert frame[0] == expected
+        assert not frame.flags.writeable
+    assert consumer.stats()["overflow_frames"] == 0
+
+
+def test_lapped_consumer_resumes_half_a_ring_behind(ring):
+    consumer = ring.subscribe("slow")
+    ring.recorder.produce(20)
+    wait_for_seq(ring, 20)
+
+    # 20 behind on an 8-slot ring: resume at 20 - 8 // 2 = 16, counting 16 frames as lost
+    assert consumer.read(timeout=1)[0] == 16
+    assert consumer.overflow_frames == 16
+    assert consumer.read(timeout=1)[0] == 17
+    assert consumer.lag == 2
+
+
+def test_consumer_at_the_margin_is_not_resynced(ring):
+    consumer = ring.subscribe("edge")
+    # slots - 1 - margin = 5 frames behind is still safe to read
+    ring.recorder.produce(5)
+    wait_for_seq(ring, 5)
+
+    assert consumer.read(timeout=1)[0] == 0
+    assert consumer.overflow_frames == 0
+    assert consumer.lag_max == 4
+
+
+def test_consumer_past_the_margin_is_resynced(ring):
+    consumer = ring.subscribe("edge")
+    # One more frame and the oldest unread slot is within the margin of the one being written
+    ring.recorder.produce(6)
+    wait_for_seq(ring, 6)
+
+    assert consumer.read(timeout=1)[0] == 2
+    assert consumer.overflow_frames == 2
+
+
+def test_consumers_do_not_steal_frames(ring):
+    first = ring.subscribe("first")
+    second = ring.subscribe("second")
+    ring.recorder.produce(2)
+    assert [first.read(timeout=1)[0] for _ in range(2)] == [0, 1]
+    assert [second.read(timeout=1)[0] for _ in range(2)] == [0, 1]
+
+
+def test_read_times_out_without_frames(ring):
+    consumer = ring.subscribe("idle")
+    assert consumer.read(timeout=0.05) is None
+
+
+def test_read_returns_none_after_stop():
+    recorder = FakeRecorder()
+    ring = MicrophoneRing(recorder, FRAME_LENGTH, slots=8, margin=2).start()
+    consumer = ring.subscribe("waiting")
+
+    result = []
+    reader = threading.Thread(target=lambda: result.append(consumer.read()))
+    reader.start()
+    time.sleep(0.05)
+
+    recorder.closed = True
+    ring.stop()
+    reader.join(timeout=1)
+    assert not reader.is_alive()
+    assert result == [None]
+    assert consumer.read(timeout=1) is None
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class TtsCache:
+    """Content-addressed on-disk cache of synthesized speech.
+
+    Each entry is a raw little-endian int16 PCM file named after the hash of everything
+    that affects the audio, so a hit can be memory-mapped and played without decoding.
+    Entries are evicted least-recently-used once the directory exceeds `max_bytes`;
+    recency survives restarts through the files' modification times.
+    """
+
+    def __init__(self, directory: str = "tts_cache", max_bytes: int = 200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.index = OrderedDict()  # key -> size in bytes, least recently used first
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(directory):
+            if not name.endswith(".pcm"):
+                continue
+            stat = os.stat(os.path.join(directory, name))
+            entries.append((stat.st_mtime, name[:-len(".pcm")], stat.st_size))
+        for _, key, size in sorted(entries):
+            self.index[key] = size
+
+    @staticmethod
+    def make_key(text: str, voice_id: str, model_id: str, sample_rate: int, speed, gain: float = 1.0) -> str:
+        payload = json.dumps([text, voice_id, model_id, sample_rate, speed, gain])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pcm")
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self.index.values())
+
+    def get(self, key: str):
+        """Return the cached samples as a read-only memory map, or None on a miss."""
+        with self.lock:
+            if key not in self.index:
+                self.misses += 1
+                return None
+
+            path = self._path(key)
+            try:
+                samples = np.memmap(path, dtype=np.int16, mode="r")
+                os.utime(path)
+            except (OSError, ValueError) as e:
+                print(f"Dropping unreadable TTS cache entry {key}: {e}")
+                self.index.pop(key, None)
+                self.misses += 1
+                return None
+
+            self.index.move_to_end(key)
+            self.hits += 1
+            return samples
+
+    def put(self, key: str, pcm):
+        """Store int16 PCM under `key`, replacing any previous entry atomically."""
+        pcm = memoryview(pcm).cast("B")
+        if len(pcm) == 0:
+            return
+
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(pcm)
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            self.index[key] = len(pcm)
+            self.index.move_to_end(key)
+            self._evict()
+
+    def _evict(self):
+        total = self.total_bytes
+        # Always keep the newest entry, even if it alone is over budget
+        while total > self.max_bytes and len(self.index) > 1:
+            key, size = self.index.popitem(last=False)
+            total -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.index),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
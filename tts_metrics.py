@@ -0,0 +1,86 @@
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass
+class UtteranceMetrics:
+    """Per-utterance TTS timings, all taken from `time.perf_counter()`.
+
+    The split tells where a slow response comes from: time-to-first-byte and chunk
+    interarrival point at the network, underruns and a late playback start at the
+    jitter buffer, and mouth lag at lip-sync falling behind playback.
+    """
+
+    text: str
+    sample_rate: int
+    cache_hit: bool = False
+    started: float = field(default_factory=time.perf_counter)
+    request_sent: float | None = None
+    first_audio: float | None = None
+    last_audio: float | None = None
+    playback_start: float | None = None
+    finished: float | None = None
+    audio_samples: int = 0
+    chunk_times: list = field(default_factory=list)
+    underruns: int = 0
+    buffer_fill: dict = field(default_factory=dict)
+    mouth_lag_max_s: float = 0.0
+
+    def mark_request(self):
+        if self.request_sent is None:
+            self.request_sent = time.perf_counter()
+
+    def mark_chunk(self, samples: int):
+        now = time.perf_counter()
+        if self.first_audio is None:
+            self.first_audio = now
+        self.last_audio = now
+        self.chunk_times.append(now)
+        self.audio_samples += samples
+
+    def mark_mouth_lag(self, lag_s: float):
+        self.mouth_lag_max_s = max(self.mouth_lag_max_s, lag_s)
+
+    def finish(self, playback_start: float | None, playback_stats: dict):
+        self.finished = time.perf_counter()
+        self.playback_start = playback_start
+        self.underruns = playback_stats.get("underruns", 0)
+        self.buffer_fill = {k: round(v, 1) for k, v in playback_stats.items() if k.startswith("fill_")}
+
+    def _ms_since_start(self, t: float | None):
+        return None if t is None else round((t - self.started) * 1000, 1)
+
+    @property
+    def audio_duration_s(self) -> float:
+        return self.audio_samples / self.sample_rate if self.sample_rate else 0.0
+
+    def summary(self) -> dict:
+        gaps = np.diff(self.chunk_times) * 1000 if len(self.chunk_times) > 1 else np.zeros(0)
+        wall_s = (self.finished or time.perf_counter()) - self.started
+        return {
+            "text": self.text,
+            "cache_hit": self.cache_hit,
+            "request_sent_ms": self._ms_since_start(self.request_sent),
+            "first_audio_ms": self._ms_since_start(self.first_audio),
+            "ttfb_ms": (
+                round((self.first_audio - self.request_sent) * 1000, 1)
+                if self.first_audio is not None and self.request_sent is not None
+                else None
+            ),
+            "playback_start_ms": self._ms_since_start(self.playback_start),
+            "chunks": len(self.chunk_times),
+            "interarrival_ms": {
+                "mean": round(float(gaps.mean()), 1) if len(gaps) else None,
+                "p50": round(float(np.percentile(gaps, 50)), 1) if len(gaps) else None,
+                "p90": round(float(np.percentile(gaps, 90)), 1) if len(gaps) else None,
+                "max": round(float(gaps.max()), 1) if len(gaps) else None,
+            },
+            "underruns": self.underruns,
+            "buffer_fill_ms": self.buffer_fill,
+            "mouth_lag_max_ms": round(self.mouth_lag_max_s * 1000, 1),
+            "audio_duration_s": round(self.audio_duration_s, 3),
+            "wall_s": round(wall_s, 3),
+            "real_time_factor": round(wall_s / self.audio_duration_s, 3) if self.audio_duration_s else None,
+        }
@@ -0,0 +1,187 @@
+import os
+import queue
+import threading
+import time
+import wave
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass
+class UtteranceRecord:
+    """Lightweight reference to an archived utterance, cheap enough to hand to tracing."""
+
+    text: str
+    path: str
+    sample_rate: int
+    frames: int = 0
+    dropped_chunks: int = 0
+    dropped: bool = False  # The whole recording was given up because the queue was full
+    preview: list = field(default_factory=list)
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+    preview_tail: np.ndarray | None = field(default=None, repr=False)  # Samples short of a full preview bin
+
+    @property
+    def duration_s(self) -> float:
+        return self.frames / self.sample_rate if self.sample_rate else 0.0
+
+    def summary(self) -> dict:
+        return {
+            "text": self.text,
+            "path": self.path,
+            "sample_rate": self.sample_rate,
+            "duration_s": round(self.duration_s, 3),
+            "dropped_chunks": self.dropped_chunks,
+            "dropped": self.dropped,
+            "preview": self.preview,
+        }
+
+
+class UtteranceArchiver:
+    """Background writer that streams utterance audio into a bounded, rotating WAV store.
+
+    Chunks are queued as they arrive and written by a single thread, so the response path
+    never waits on the SD card. If the queue is full a chunk is dropped and counted rather
+    than blocking playback. After each utterance the oldest recordings are deleted until
+    the store is within `max_files` and `max_bytes`. If the open or close of an utterance
+    cannot be queued, the whole recording is dropped and its partial file removed.
+    """
+
+    def __init__(
+        self,
+        directory: str = "recordings",
+        max_files: int = 200,
+        max_bytes: int = 100 * 1024 * 1024,
+        preview_rate: int = 50,
+        max_queue: int = 256,
+    ):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.preview_rate = preview_rate
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.thread = None
+        self._counter = 0
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, name="utterance-archiver", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join(timeout=5)
+            self.thread = None
+
+    def begin(self, text: str, sample_rate: int) -> UtteranceRecord:
+        self._counter += 1
+        name = f"utterance-{time.strftime('%Y%m%d-%H%M%S')}-{self._counter:04d}.wav"
+        record = UtteranceRecord(text=text, path=os.path.join(self.directory, name), sample_rate=sample_rate)
+        if not self._submit(("open", record, None)):
+            self._drop(record)
+            record.done.set()  # Nothing was ever opened, so there is nothing left to close
+        return record
+
+    def append(self, record: UtteranceRecord, samples: np.ndarray):
+        """Queue int16 samples for `record`. The caller must not modify them afterwards."""
+        if record.dropped or not self._submit(("write", record, samples)):
+            record.dropped_chunks += 1
+
+    def finish(self, record: UtteranceRecord):
+        if record.dropped:
+            return
+        if not self._submit(("close", record, None)):
+            # The writer thread notices the flag and discards the open file
+            self._drop(record)
+
+    def _drop(self, record: UtteranceRecord):
+        record.dropped = True
+        print(f"Archive queue full, dropping recording {record.path}")
+
+    def _submit(self, item) -> bool:
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except queue.Full:
+            return False
+
+    def _run(self):
+        writers = {}
+        while True:
+            try:
+                item = self.queue.get(timeout=1.0)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                break
+            if item:
+                self._handle(writers, *item)
+
+            # Records whose close could not be queued are discarded here
+            for key, (record, writer) in list(writers.items()):
+                if record.dropped:
+                    del writers[key]
+                    self._discard(record, writer)
+
+        for record, writer in writers.values():
+            writer.close()
+
+    def _handle(self, writers, action, record, samples):
+        try:
+            if action == "open":
+                writer = wave.open(record.path, "wb")
+                writer.setnchannels(1)
+                writer.setsampwidth(2)
+                writer.setframerate(record.sample_rate)
+                writers[id(record)] = (record, writer)
+            elif action == "write" and id(record) in writers:
+                writers[id(record)][1].writeframes(samples)
+                record.frames += len(samples)
+                self._preview(record, samples)
+            elif action == "close":
+                entry = writers.pop(id(record), None)
+                if entry is not None:
+                    entry[1].close()
+                if record.preview_tail is not None and len(record.preview_tail):
+                    record.preview.append(int(np.abs(record.preview_tail.astype(np.int32)).max()))
+                    record.preview_tail = None
+                record.done.set()
+                self._rotate()
+        except Exception as e:
+            print(f"Error archiving utterance {record.path}: {e}")
+            if action == "close":
+                record.done.set()
+
+    def _preview(self, record: UtteranceRecord, samples: np.ndarray):
+        # Peak amplitude per preview bin, good enough to eyeball in a trace. Samples that do
+        # not fill a bin are carried over to the next chunk so no chunk boundary loses any.
+        step = max(1, record.sample_rate // self.preview_rate)
+        if record.preview_tail is not None:
+            samples = np.concatenate((record.preview_tail, samples))
+        usable = len(samples) - len(samples) % step
+        # int32 first: abs(-32768) does not fit in int16
+        peaks = np.abs(samples[:usable].astype(np.int32)).reshape(-1, step).max(axis=1)
+        record.preview.extend(int(p) for p in peaks)
+        record.preview_tail = samples[usable:].copy()
+
+    def _discard(self, record: UtteranceRecord, writer):
+        try:
+            writer.close()
+            os.remove(record.path)
+        except OSError as e:
+            print(f"Error discarding utterance {record.path}: {e}")
+        record.done.set()
+
+    def _rotate(self):
+        recordings = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".wav")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        total = sum(entry.stat().st_size for entry in recordings)
+        while recordings and (len(recordings) > self.max_files or total > self.max_bytes):
+            oldest = recordings.pop(0)
+            total -= oldest.stat().st_size
+            os.remove(oldest.path)